@@ -0,0 +1,43 @@
+"""
+Blender-free asset pipeline tools for Homestead Headaches.
+
+Pure Python + NumPy. Run from the scripts directory as `python -m
+asset_pipeline`, or import from Blender scripts after adding scripts/ to
+sys.path.
+"""
+
+from .delta import PatchError, apply_delta, make_delta, update_patches
+from .glb import Glb, GlbError
+from .manifest import build_manifest, write_manifest
+from .materials import dedupe_materials, report_signatures
+from .transforms import (
+    patch_materials,
+    prune_accessors,
+    recenter,
+    run,
+    set_extras,
+    strip_extras,
+    strip_root_motion,
+    transform_file,
+)
+
+__all__ = [
+    "Glb",
+    "GlbError",
+    "PatchError",
+    "apply_delta",
+    "build_manifest",
+    "dedupe_materials",
+    "make_delta",
+    "patch_materials",
+    "prune_accessors",
+    "recenter",
+    "report_signatures",
+    "run",
+    "set_extras",
+    "strip_extras",
+    "strip_root_motion",
+    "transform_file",
+    "update_patches",
+    "write_manifest",
+]
@@ -0,0 +1,228 @@
+"""
+Command line entry point.
+
+    cd scripts
+    python -m asset_pipeline transform --recenter --prune
+    python -m asset_pipeline transform ../public/assets/models/farmers/john.glb --strip-root-motion
+    python -m asset_pipeline optimize
+    python -m asset_pipeline split ../public/assets/models/farmers/john.glb --base-clips idle
+    python -m asset_pipeline materials
+    python -m asset_pipeline manifest
+    python -m asset_pipeline apply-patch old.glb cow.glb.1f2e3d4c5b6a7980.patch new.glb
+"""
+
+import argparse
+import json
+import os
+import sys
+from functools import partial
+
+from .delta import PatchError, apply_delta
+from .glb import GlbError
+from .manifest import write_manifest
+from .materials import dedupe_materials, report_signatures
+from .meshopt import optimize_file
+from .split import DEFAULT_BASE_CLIPS, split_animations
+from .transforms import (
+    patch_materials,
+    prune_accessors,
+    recenter,
+    set_extras,
+    strip_extras,
+    strip_root_motion,
+    transform_file,
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PUBLIC_DIR = os.path.join(PROJECT_ROOT, "public")
+MODELS_DIR = os.path.join(PUBLIC_DIR, "assets", "models")
+
+
+def find_glbs(paths):
+    """Expand directories to the GLBs below them; default to every model."""
+    found = []
+    for path in paths or [MODELS_DIR]:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                found.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(".glb"))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def _display_path(path):
+    path = os.path.abspath(path)
+    return os.path.relpath(path, PROJECT_ROOT) if path.startswith(PROJECT_ROOT + os.sep) else path
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_assignments(items):
+    """KEY=VALUE pairs; values are parsed as JSON when possible."""
+    result = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        result[key] = _parse_value(value)
+    return result
+
+
+def cmd_transform(args):
+    chain = []
+    if args.strip_extras:
+        chain.append(strip_extras)
+    if args.dedupe_materials:
+        chain.append(dedupe_materials)
+    if args.recenter:
+        chain.append(partial(recenter, ground=not args.center_vertically))
+    if args.strip_root_motion:
+        chain.append(strip_root_motion)
+    if args.patch_material:
+        patches = {}
+        for item in args.patch_material:
+            name, _, assignment = item.partition(":")
+            patches.setdefault(name, {}).update(_parse_assignments([assignment]))
+        chain.append(partial(patch_materials, patches=patches))
+    if args.extras:
+        chain.append(partial(set_extras, extras=_parse_assignments(args.extras)))
+    if args.prune:
+        chain.append(prune_accessors)
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    total_ms = 0.0
+    done = 0
+    failed = []
+    for path in find_glbs(args.paths):
+        dst = os.path.join(args.out_dir, os.path.basename(path)) if args.out_dir else None
+        try:
+            stats = transform_file(path, chain, dst)
+        except GlbError as e:
+            # e.g. a Git LFS pointer that was never pulled; the others still run
+            failed.append(path)
+            print(f"  WARNING: {_display_path(path)}: {e}")
+            continue
+        done += 1
+        total_ms += stats["ms"]
+        print(f"  {_display_path(stats['path'])}: "
+              f"{stats['bytes_in']} -> {stats['bytes_out']} bytes in {stats['ms']:.1f} ms")
+    print(f"Done in {total_ms:.1f} ms")
+    if failed:
+        print(f"{len(failed)} of {len(failed) + done} files failed")
+        return 1
+    return 0
+
+
+def cmd_optimize(args):
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    failed = 0
+    for path in find_glbs(args.paths):
+        dst = os.path.join(args.out_dir, os.path.basename(path)) if args.out_dir else None
+        try:
+            optimize_file(path, dst, cache_size=args.cache_size)
+        except GlbError as e:
+            failed += 1
+            print(f"  WARNING: {_display_path(path)}: {e}")
+    return 1 if failed else 0
+
+
+def cmd_split(args):
+    failed = 0
+    for path in args.paths:
+        try:
+            split_animations(path, base_clips=args.base_clips)
+        except GlbError as e:
+            failed += 1
+            print(f"  WARNING: {_display_path(path)}: {e}")
+    return 1 if failed else 0
+
+
+def cmd_materials(args):
+    _, failed = report_signatures(find_glbs(args.paths), display=_display_path)
+    return 1 if failed else 0
+
+
+def cmd_manifest(args):
+    write_manifest(args.public_dir, args.output, patches=not args.no_patches)
+    return 0
+
+
+def cmd_apply_patch(args):
+    # Stream into a temporary file; the output only appears once size and hash check out
+    tmp = args.output + ".tmp"
+    try:
+        with open(args.source, "rb") as source, open(args.patch, "rb") as patch, open(tmp, "wb") as out:
+            size = apply_delta(source, patch, out)
+    except PatchError as e:
+        os.remove(tmp)
+        print(f"{_display_path(args.patch)}: {e}")
+        return 1
+    os.replace(tmp, args.output)
+    print(f"{_display_path(args.output)}: {size} bytes, hash verified")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="asset_pipeline", description="Homestead Headaches asset pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    transform = commands.add_parser("transform", help="Apply post-export transforms to GLBs")
+    transform.add_argument("paths", nargs="*", help="GLB files or directories (default: public/assets/models)")
+    transform.add_argument("--recenter", action="store_true", help="Center on the origin with the feet at y=0")
+    transform.add_argument("--center-vertically", action="store_true", help="With --recenter, center y instead of grounding")
+    transform.add_argument("--strip-root-motion", action="store_true", help="Pin root joint x/z translation")
+    transform.add_argument("--patch-material", action="append", metavar="NAME:PATH=VALUE",
+                           help='e.g. "*:pbrMetallicRoughness.roughnessFactor=0.8"')
+    transform.add_argument("--strip-extras", action="store_true", help="Remove all extras before other transforms")
+    transform.add_argument("--dedupe-materials", action="store_true",
+                           help="Merge materials that differ only by name")
+    transform.add_argument("--extras", action="append", metavar="KEY=VALUE", help="Set asset.extras keys")
+    transform.add_argument("--prune", action="store_true", help="Remove unused accessors")
+    transform.add_argument("--out-dir", help="Write results here instead of in place")
+    transform.set_defaults(func=cmd_transform)
+
+    optimize = commands.add_parser("optimize", help="Weld and reorder meshes for vertex cache, overdraw and fetch")
+    optimize.add_argument("paths", nargs="*", help="GLB files or directories (default: public/assets/models)")
+    optimize.add_argument("--cache-size", type=int, default=16, help="FIFO cache size to optimize for")
+    optimize.add_argument("--out-dir", help="Write results here instead of in place")
+    optimize.set_defaults(func=cmd_optimize)
+
+    split = commands.add_parser("split", help="Move clips out of a GLB into lazily loaded chunks")
+    split.add_argument("paths", nargs="+", help="GLB files to split in place")
+    split.add_argument("--base-clips", nargs="+", default=list(DEFAULT_BASE_CLIPS),
+                       help="Clips kept in the base file (default: idle)")
+    split.set_defaults(func=cmd_split)
+
+    materials = commands.add_parser("materials", help="Count unique shader signatures across GLBs")
+    materials.add_argument("paths", nargs="*", help="GLB files or directories (default: public/assets/models)")
+    materials.set_defaults(func=cmd_materials)
+
+    manifest = commands.add_parser("manifest", help="Write public/assets/manifest.json")
+    manifest.add_argument("--public-dir", default=PUBLIC_DIR)
+    manifest.add_argument("--output", help="Manifest path (default: <public-dir>/assets/manifest.json)")
+    manifest.add_argument("--no-patches", action="store_true",
+                          help="Don't publish a release or write binary patches to asset-patches/")
+    manifest.set_defaults(func=cmd_manifest)
+
+    apply_patch = commands.add_parser("apply-patch", help="Rebuild a new asset from its old version and a patch")
+    apply_patch.add_argument("source", help="Old version of the asset")
+    apply_patch.add_argument("patch", help=".patch file from asset-patches/")
+    apply_patch.add_argument("output", help="Where to write the patched asset")
+    apply_patch.set_defaults(func=cmd_apply_patch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+Block-level binary deltas between released asset versions.
+
+Installed Capacitor builds carry a full copy of public/, so a one-vertex
+change to a GLB would otherwise mean re-downloading the whole file. After
+every manifest write, update_patches() compares each GLB and sprite with the
+newest published release and, if any changed, publishes the next one: an
+rsync-style delta for each changed file from its version in each of the last
+few releases, plus a versioned patch manifest, in asset-patches/v<N>/.
+
+Both halves are committed. asset-patches/ holds what clients fetch, and its
+latest.json is where the next release number comes from. asset-history/
+holds releases.json (the hash of every tracked asset in each retained
+release) and the released files themselves, content-addressed under
+objects/ and stored in Git LFS, so any checkout can build patches from the
+versions installed apps actually have.
+
+Deltas (make_delta) index the old file in fixed-size blocks by a weak
+rolling checksum plus a strong hash, then scan the new file at every byte
+offset and emit COPY ops for blocks found in the old file and DATA ops for
+everything else. The weak checksums are computed with NumPy cumulative sums
+over bounded windows; only offsets whose checksum is in the table get a
+strong hash, a match is extended block by block by comparing bytes, and
+offsets inside a match are never scanned.
+
+Patch format, little-endian, readable front to back so it can be applied
+while it downloads (the old file needs random access, the new one is written
+sequentially):
+
+    magic      8 bytes  b"HHPATCH1"
+    block      u32      block size used to build the delta
+    src_size   u64      + src_sha256 (32 bytes)
+    dst_size   u64      + dst_sha256 (32 bytes)
+    ops:
+      0x01 COPY  u64 source offset, u32 length
+      0x02 DATA  u32 length, then that many bytes
+      0x00 END
+
+The patch manifest (asset-patches/v<N>/patch-manifest.json, copied to
+asset-patches/latest.json) lists every asset changed since the baseline with
+its current hash, the release it last changed in and the patches available
+from its hash in each retained older release:
+
+    {"version": 4, "blockSize": 1024, "assets": [
+      {"path": "assets/models/animals/cow.glb", "bytes": 81234,
+       "sha256": "...", "version": 4,
+       "patches": [{"from": "<sha256>", "fromBytes": 80012,
+                                     "uri": "v4/assets/models/animals/cow.glb.1f2e....patch",
+                                     "bytes": 6120}]}]}
+
+An asset with no patch from the installed hash is downloaded in full.
+asset-patches/ is committed and copied into the web build's dist/ by
+vite.config.ts, which is where installed apps fetch it from.
+"""
+
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+
+MAGIC = b"HHPATCH1"
+OP_END, OP_COPY, OP_DATA = 0, 1, 2
+DEFAULT_BLOCK_SIZE = 1024
+KEEP_VERSIONS = 3
+WINDOW = 1 << 20  # offsets checksummed per NumPy pass, bounds make_delta's memory
+MAX_PATCH_RATIO = 0.8  # larger patches are dropped; the full file is about as cheap
+
+DELTA_PATTERNS = (
+    "assets/models/*.glb",
+    "assets/sprites/*.png",
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HISTORY_DIR = os.path.join(PROJECT_ROOT, "asset-history")
+PATCHES_DIR = os.path.join(PROJECT_ROOT, "asset-patches")
+
+_HEADER = struct.Struct("<8sIQ32sQ32s")
+_COPY = struct.Struct("<BQI")
+_DATA = struct.Struct("<BI")
+
+
+class PatchError(ValueError):
+    """Raised for patches that are truncated, corrupt or for another basis."""
+
+
+# ── Delta encoding ───────────────────────────────────────────
+
+
+def _weak_checksums(data, block_size, step):
+    """
+    rsync's weak checksum of data[k:k+block_size] for k = 0, step, 2*step, ...
+
+    Both halves are sums mod 2**16, so uint32 cumulative sums that wrap give
+    the same result. The weighted half comes from a second cumulative sum:
+    sum((k + block_size - i) * x[i]) = sum(s1[k+1:k+block_size+1]) - block_size * s1[k].
+    """
+    x = np.frombuffer(data, dtype=np.uint8)
+    n = len(x) - block_size + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint32)
+    s1 = np.zeros(len(x) + 1, dtype=np.uint32)
+    np.cumsum(x, dtype=np.uint32, out=s1[1:])
+    s2 = np.zeros(len(x) + 2, dtype=np.uint32)
+    np.cumsum(s1, dtype=np.uint32, out=s2[1:])
+    a = s1[block_size:block_size + n:step] - s1[:n:step]
+    b = s2[block_size + 1:block_size + 1 + n:step] - s2[1:n + 1:step] - np.uint32(block_size) * s1[:n:step]
+    return (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+
+
+def _strong(block):
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def _block_table(old, block_size):
+    """{weak: [(strong, offset), ...]} for every whole block of old."""
+    blocks = {}
+    span = max(1, WINDOW // block_size) * block_size
+    for start in range(0, len(old) - block_size + 1, span):
+        weak = _weak_checksums(old[start:start + span], block_size, block_size)
+        for index, value in enumerate(weak.tolist()):
+            offset = start + index * block_size
+            blocks.setdefault(value, []).append((_strong(old[offset:offset + block_size]), offset))
+    return blocks
+
+
+def _filter_slots(weak, bits):
+    """Multiplicative hash of weak checksums into a 2**bits entry filter."""
+    return (weak * np.uint32(0x9E3779B1)) >> np.uint32(32 - bits)
+
+
+def make_delta(old, new, block_size=DEFAULT_BLOCK_SIZE):
+    """Return patch bytes that turn old into new."""
+    old, new = bytes(old), bytes(new)
+    out = [_HEADER.pack(MAGIC, block_size, len(old), hashlib.sha256(old).digest(),
+                        len(new), hashlib.sha256(new).digest())]
+
+    blocks = _block_table(old, block_size) if len(new) >= block_size else {}
+    known = np.sort(np.fromiter(blocks, dtype=np.uint32, count=len(blocks)))
+    # A bitmap of the table's checksums rules out most offsets with one
+    # lookup each; the binary search only sees what's left
+    bits = min(32, max(16, 4 + len(known).bit_length()))
+    present = np.zeros(1 << bits, dtype=bool)
+    present[_filter_slots(known, bits)] = True
+
+    literal_start = 0
+    copy_offset, copy_length = None, 0
+
+    def flush_copy():
+        nonlocal copy_offset, copy_length
+        if copy_length:
+            out.append(_COPY.pack(OP_COPY, copy_offset, copy_length))
+        copy_offset, copy_length = None, 0
+
+    # Checksum WINDOW offsets at a time, starting past whatever the last
+    # match covered; only offsets whose weak checksum is in the table are
+    # hashed and looked up
+    position = 0
+    last = len(new) - block_size
+    while blocks and position <= last:
+        window_start = position
+        window_end = min(position + WINDOW, last + 1)
+        weak = _weak_checksums(new[window_start:window_end + block_size - 1], block_size, 1)
+        maybe = np.flatnonzero(present[_filter_slots(weak, bits)])
+        slot = np.minimum(np.searchsorted(known, weak[maybe]), len(known) - 1)
+        hits = window_start + maybe[known[slot] == weak[maybe]]
+
+        i = 0
+        while i < len(hits):
+            k = int(hits[i])
+            strong = _strong(new[k:k + block_size])
+            matches = [offset for digest, offset in blocks[int(weak[k - window_start])] if digest == strong]
+            if not matches:
+                i += 1
+                continue
+            if k > literal_start:
+                flush_copy()
+                out.append(_DATA.pack(OP_DATA, k - literal_start))
+                out.append(new[literal_start:k])
+            if not (copy_length and copy_offset + copy_length == matches[0]):
+                flush_copy()
+                copy_offset = matches[0]
+            copy_length += block_size
+            literal_start = k + block_size
+            # Unchanged runs: extend the COPY block by block by comparing bytes
+            while (literal_start + block_size <= len(new)
+                   and copy_offset + copy_length + block_size <= len(old)
+                   and new[literal_start:literal_start + block_size]
+                   == old[copy_offset + copy_length:copy_offset + copy_length + block_size]):
+                copy_length += block_size
+                literal_start += block_size
+            i = int(np.searchsorted(hits, literal_start))
+        position = max(window_end, literal_start)
+
+    flush_copy()
+    if literal_start < len(new):
+        out.append(_DATA.pack(OP_DATA, len(new) - literal_start))
+        out.append(new[literal_start:])
+    out.append(bytes([OP_END]))
+    return b"".join(out)
+
+
+def _read_exact(stream, length, what):
+    data = stream.read(length)
+    if len(data) != length:
+        raise PatchError(f"Patch is truncated in {what}")
+    return data
+
+
+def _source_size(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    source.seek(0, os.SEEK_END)
+    return source.tell()
+
+
+def apply_delta(source, patch, out=None):
+    """
+    Apply patch to source (bytes or a seekable binary file). patch is bytes
+    or a binary stream read front to back; output goes to the writable out
+    if given, else is returned as bytes.
+
+    Raises PatchError if the patch is truncated or corrupt, was made against
+    a source of another size, or doesn't reproduce the target size and
+    SHA-256. Output already streamed to out is then invalid, so callers
+    writing a file should write it somewhere temporary first.
+    """
+    def read_source(offset, length):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return memoryview(source)[offset:offset + length]
+        source.seek(offset)
+        return source.read(length)
+
+    if isinstance(patch, (bytes, bytearray, memoryview)):
+        patch = io.BytesIO(patch)
+
+    magic, block_size, src_size, _, dst_size, dst_sha = _HEADER.unpack(_read_exact(patch, _HEADER.size, "the header"))
+    if magic != MAGIC:
+        raise PatchError("Not an asset patch (bad magic)")
+    if not block_size:
+        raise PatchError("Patch header has a zero block size")
+    if _source_size(source) != src_size:
+        raise PatchError(f"Patch expects a {src_size} byte source, got {_source_size(source)} bytes")
+
+    chunks = [] if out is None else None
+    digest = hashlib.sha256()
+    written = 0
+    while True:
+        (op,) = _read_exact(patch, 1, "an op code")
+        if op == OP_END:
+            break
+        if op == OP_COPY:
+            offset, length = struct.unpack("<QI", _read_exact(patch, _COPY.size - 1, "a COPY op"))
+            if written + length > dst_size:
+                raise PatchError(f"COPY of {length} bytes overruns the {dst_size} byte target")
+            if offset + length > src_size:
+                raise PatchError(f"COPY of {length} bytes at {offset} runs past the {src_size} byte source")
+            data = read_source(offset, length)
+            if len(data) != length:
+                raise PatchError(f"Source ended inside a COPY at {offset}")
+        elif op == OP_DATA:
+            (length,) = struct.unpack("<I", _read_exact(patch, _DATA.size - 1, "a DATA op"))
+            if written + length > dst_size:
+                raise PatchError(f"DATA of {length} bytes overruns the {dst_size} byte target")
+            data = _read_exact(patch, length, "DATA bytes")
+        else:
+            raise PatchError(f"Unknown patch op {op}")
+        written += len(data)
+        digest.update(data)
+        if out is None:
+            chunks.append(bytes(data))
+        else:
+            out.write(data)
+
+    if written != dst_size:
+        raise PatchError(f"Patch produced {written} bytes, expected {dst_size}")
+    if digest.digest() != dst_sha:
+        raise PatchError("Patched output does not match the target SHA-256")
+    return b"".join(chunks) if out is None else written
+
+
+# ── Releases and base files ─────────────────────────────────
+
+
+def _tracked(rel_path):
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in DELTA_PATTERNS)
+
+
+def _object_path(history_dir, sha):
+    return os.path.join(history_dir, "objects", sha[:2], sha)
+
+
+def _load_releases(history_dir):
+    path = os.path.join(history_dir, "releases.json")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)["releases"]
+
+
+def _save_releases(history_dir, releases):
+    os.makedirs(history_dir, exist_ok=True)
+    path = os.path.join(history_dir, "releases.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"releases": releases}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _published_version(patches_dir):
+    """The newest release in patches_dir (latest.json or a v<N>/ dir), 0 if there is none."""
+    version = 0
+    latest = os.path.join(patches_dir, "latest.json")
+    if os.path.exists(latest):
+        with open(latest) as f:
+            version = json.load(f)["version"]
+    if os.path.isdir(patches_dir):
+        for name in os.listdir(patches_dir):
+            if name.startswith("v") and name[1:].isdigit():
+                version = max(version, int(name[1:]))
+    return version
+
+
+def _store(history_dir, sha, src):
+    dst = _object_path(history_dir, sha)
+    if not os.path.exists(dst):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(src, dst)
+
+
+def _load_base(history_dir, sha):
+    """Bytes of a released version, or None if missing or not what was released (e.g. an LFS pointer)."""
+    path = _object_path(history_dir, sha)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    return data if hashlib.sha256(data).hexdigest() == sha else None
+
+
+def _collect_garbage(history_dir, releases):
+    live = {sha for release in releases for sha in release["assets"].values()}
+    objects = os.path.join(history_dir, "objects")
+    for dirpath, _, filenames in os.walk(objects):
+        for filename in filenames:
+            if filename not in live:
+                os.remove(os.path.join(dirpath, filename))
+
+
+def _write_patch_manifest(patches_dir, patch_manifest):
+    release_dir = os.path.join(patches_dir, f"v{patch_manifest['version']}")
+    os.makedirs(release_dir, exist_ok=True)
+    for target in (os.path.join(release_dir, "patch-manifest.json"), os.path.join(patches_dir, "latest.json")):
+        with open(target, "w") as f:
+            json.dump(patch_manifest, f, indent=2)
+            f.write("\n")
+    return release_dir
+
+
+def update_patches(public_dir, manifest, history_dir=HISTORY_DIR, patches_dir=PATCHES_DIR,
+                   block_size=DEFAULT_BLOCK_SIZE, keep=KEEP_VERSIONS):
+    """
+    Publish the tracked assets of manifest as a new release if any changed
+    since the newest one in patches_dir, with patches from their versions in
+    each of the last keep releases. Returns the patch manifest, or None if
+    nothing changed or this was the baseline.
+
+    The release number comes from patches_dir, never from history_dir, so a
+    missing or stale history can't reuse a published v<N>/. Without the base
+    files of the newest release, every asset is listed for a full download.
+    """
+    assets = [a for a in manifest["assets"] if _tracked(a["path"])]
+    current = {a["path"]: a["sha256"] for a in assets}
+    published = _published_version(patches_dir)
+    releases = _load_releases(history_dir)
+
+    if not published:
+        for asset in assets:
+            _store(history_dir, asset["sha256"], os.path.join(public_dir, asset["path"]))
+        releases = [{"version": 1, "assets": current}]
+        _save_releases(history_dir, releases)
+        _collect_garbage(history_dir, releases)
+        _write_patch_manifest(patches_dir, {"version": 1, "blockSize": block_size, "assets": []})
+        print(f"Asset patches: recorded baseline v1 of {len(assets)} assets in {history_dir}")
+        return None
+
+    if not releases or releases[-1]["version"] != published:
+        print(f"Asset patches: WARNING: {history_dir} has no base files for the published v{published}, "
+              "so every asset is listed without patches")
+        releases = []
+
+    # An asset with the same hash as in the newest release hasn't changed
+    newest = releases[-1]["assets"] if releases else {}
+    changed = [a for a in assets if newest.get(a["path"]) != a["sha256"]]
+    if not changed:
+        print("Asset patches: no GLB or sprite changed")
+        return None
+
+    version = published + 1
+    patch_manifest = {"version": version, "blockSize": block_size, "assets": []}
+    full_bytes = patch_bytes = 0
+
+    for asset in changed:
+        path = os.path.join(public_dir, asset["path"])
+        with open(path, "rb") as f:
+            new = f.read()
+        entry = {"path": asset["path"], "bytes": len(new), "sha256": asset["sha256"], "version": version,
+                 "patches": []}
+        # Newest release first; a revert to an older version gets no self-patch
+        bases = []
+        for release in reversed(releases):
+            old_sha = release["assets"].get(asset["path"])
+            if old_sha and old_sha != asset["sha256"] and old_sha not in bases:
+                bases.append(old_sha)
+        for old_sha in bases:
+            old = _load_base(history_dir, old_sha)
+            if old is None:
+                print(f"  WARNING: {asset['path']}: base {old_sha[:16]} is missing or not the released file")
+                continue
+            delta = make_delta(old, new, block_size)
+            if len(delta) > len(new) * MAX_PATCH_RATIO:
+                continue
+            apply_delta(old, delta)  # raises if the patch doesn't reproduce new
+            uri = f"v{version}/{asset['path']}.{old_sha[:16]}.patch"
+            os.makedirs(os.path.dirname(os.path.join(patches_dir, uri)), exist_ok=True)
+            with open(os.path.join(patches_dir, uri), "wb") as f:
+                f.write(delta)
+            entry["patches"].append({"from": old_sha, "fromBytes": len(old), "uri": uri, "bytes": len(delta)})
+
+        full_bytes += len(new)
+        patch_bytes += entry["patches"][0]["bytes"] if entry["patches"] else len(new)
+        best = f"{entry['patches'][0]['bytes']} byte patch" if entry["patches"] else "full download"
+        print(f"  {asset['path']}: {len(new)} bytes, {best}")
+        patch_manifest["assets"].append(entry)
+
+    # Assets unchanged in this release keep their earlier patches, so a client
+    # several versions behind only needs the latest manifest
+    changed_paths = {a["path"] for a in changed}
+    previous = os.path.join(patches_dir, "latest.json")
+    if os.path.exists(previous):
+        with open(previous) as f:
+            for entry in json.load(f)["assets"]:
+                if entry["path"] not in changed_paths and current.get(entry["path"]) == entry["sha256"]:
+                    patch_manifest["assets"].append(entry)
+    patch_manifest["assets"].sort(key=lambda entry: entry["path"])
+    release_dir = _write_patch_manifest(patches_dir, patch_manifest)
+
+    for asset in changed:
+        _store(history_dir, asset["sha256"], os.path.join(public_dir, asset["path"]))
+    releases.append({"version": version, "assets": current})
+    del releases[:-keep]
+    _save_releases(history_dir, releases)
+    _collect_garbage(history_dir, releases)
+    print(f"Asset patches v{version}: {len(changed)} changed, {patch_bytes} bytes to download "
+          f"instead of {full_bytes} -> {release_dir}")
+    return patch_manifest
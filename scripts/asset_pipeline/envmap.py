@@ -0,0 +1,257 @@
+"""
+Offline prefiltered environment maps in Babylon's .env format.
+
+Takes a linear HDR equirectangular image, resamples it to a cubemap,
+GGX-prefilters one roughness level per mip and projects the irradiance onto
+third-order spherical harmonics. The result is written as a .env file (RGBD
+PNG faces + JSON header) that CubeTexture.CreateFromPrefilteredData loads
+without any runtime filtering.
+
+Face orientation, panorama mapping, the roughness-per-mip mapping and the
+harmonics-to-polynomial conversion all follow Babylon's own tools
+(CubeMapToSphericalPolynomialTools, PanoramaToCubeMapTools, HDRFiltering,
+EnvironmentTextureTools) so the baked file matches what the engine would
+have produced at runtime.
+"""
+
+import json
+import math
+
+import numpy as np
+
+from .png import encode_png
+
+ENV_MAGIC = bytes([0x86, 0x16, 0x87, 0x96, 0xF6, 0xD6, 0x96, 0x36])
+LOD_GENERATION_SCALE = 0.8
+RGBD_MAX_RANGE = 255.0
+GAMMA = 2.2
+
+# (normal, file x axis, file y axis) for +X, -X, +Y, -Y, +Z, -Z
+CUBE_FACES = (
+    ((1, 0, 0), (0, 0, -1), (0, -1, 0)),
+    ((-1, 0, 0), (0, 0, 1), (0, -1, 0)),
+    ((0, 1, 0), (1, 0, 0), (0, 0, 1)),
+    ((0, -1, 0), (1, 0, 0), (0, 0, -1)),
+    ((0, 0, 1), (1, 0, 0), (0, -1, 0)),
+    ((0, 0, -1), (-1, 0, 0), (0, -1, 0)),
+)
+
+# Real SH basis constants in Babylon's coefficient order
+# (l00, l1_1, l10, l11, l2_2, l2_1, l20, l21, l22)
+_SH_CONSTANTS = np.array([
+    math.sqrt(1 / (4 * math.pi)),
+    -math.sqrt(3 / (4 * math.pi)),
+    math.sqrt(3 / (4 * math.pi)),
+    -math.sqrt(3 / (4 * math.pi)),
+    math.sqrt(15 / (4 * math.pi)),
+    -math.sqrt(15 / (4 * math.pi)),
+    math.sqrt(5 / (16 * math.pi)),
+    -math.sqrt(15 / (4 * math.pi)),
+    math.sqrt(15 / (16 * math.pi)),
+])
+# Cosine lobe convolution per band (incident radiance -> irradiance)
+_SH_COSINE_KERNEL = np.array([math.pi] + [2 * math.pi / 3] * 3 + [math.pi / 4] * 5)
+
+
+# ── Cubemap geometry ─────────────────────────────────────────
+
+
+def face_directions(size):
+    """Unit directions of every texel centre, shaped (6, size, size, 3)."""
+    coords = (np.arange(size) + 0.5) / size * 2 - 1
+    u, v = np.meshgrid(coords, coords)
+    dirs = np.empty((6, size, size, 3))
+    for face, (normal, axis_x, axis_y) in enumerate(CUBE_FACES):
+        d = np.array(normal) + u[..., None] * np.array(axis_x) + v[..., None] * np.array(axis_y)
+        dirs[face] = d / np.linalg.norm(d, axis=-1, keepdims=True)
+    return dirs
+
+
+def _area_element(x, y):
+    return np.arctan2(x * y, np.sqrt(x * x + y * y + 1))
+
+
+def texel_solid_angles(size):
+    """Solid angle of each texel on one face, shaped (size, size)."""
+    edges = np.arange(size + 1) / size * 2 - 1
+    x0, y0 = np.meshgrid(edges[:-1], edges[:-1])
+    x1, y1 = np.meshgrid(edges[1:], edges[1:])
+    return _area_element(x0, y0) - _area_element(x0, y1) - _area_element(x1, y0) + _area_element(x1, y1)
+
+
+def equirect_to_cube(equirect, size):
+    """
+    Bilinearly resample an equirectangular image (rows top to bottom, +Y up
+    at the top) into cube faces shaped (6, size, size, channels).
+    """
+    height, width = equirect.shape[:2]
+    dirs = face_directions(size)
+    theta = np.arctan2(dirs[..., 2], dirs[..., 0])
+    phi = np.arccos(np.clip(dirs[..., 1], -1, 1))
+    x = (theta / math.pi * 0.5 + 0.5) * width - 0.5
+    y = phi / math.pi * height - 0.5
+
+    x0 = np.floor(x).astype(np.int64)
+    y0 = np.floor(y).astype(np.int64)
+    fx = (x - x0)[..., None]
+    fy = (y - y0)[..., None]
+    xa, xb = x0 % width, (x0 + 1) % width
+    ya, yb = np.clip(y0, 0, height - 1), np.clip(y0 + 1, 0, height - 1)
+
+    top = equirect[ya, xa] * (1 - fx) + equirect[ya, xb] * fx
+    bottom = equirect[yb, xa] * (1 - fx) + equirect[yb, xb] * fx
+    return (top * (1 - fy) + bottom * fy).astype(np.float32)
+
+
+def downsample_cube(faces):
+    """Halve each face with a 2x2 box filter."""
+    _, size, _, channels = faces.shape
+    half = size // 2
+    return faces.reshape(6, half, 2, half, 2, channels).mean(axis=(2, 4))
+
+
+# ── Specular prefiltering ────────────────────────────────────
+
+
+def mip_alpha(level, size, lod_scale=LOD_GENERATION_SCALE):
+    """GGX alpha Babylon samples at a mip level (inverse of getLodFromAlphaG)."""
+    if level == 0:
+        return 0.0
+    return min(1.0, 2 ** (level / lod_scale) / size)
+
+
+def _ggx_filter(targets, sources, radiance, solid_angle, alpha, chunk=1024):
+    """GGX-weighted average of radiance around each target direction (n = v = r)."""
+    a2 = alpha * alpha
+    weight_base = solid_angle.astype(np.float32)
+    out = np.empty((len(targets), radiance.shape[1]), dtype=np.float32)
+    for start in range(0, len(targets), chunk):
+        n_dot_l = targets[start:start + chunk] @ sources.T
+        n_dot_h2 = np.maximum((1 + n_dot_l) * 0.5, 0)
+        denom = n_dot_h2 * (a2 - 1) + 1
+        weights = np.where(n_dot_l > 0, a2 / (math.pi * denom * denom) * n_dot_l, 0) * weight_base
+        out[start:start + chunk] = (weights @ radiance) / np.maximum(weights.sum(axis=1, keepdims=True), 1e-12)
+    return out
+
+
+def prefilter_specular(faces, lod_scale=LOD_GENERATION_SCALE, max_source=64):
+    """
+    Return the specular mip chain [(6, s, s, 3), ...] down to 1x1.
+
+    Level 0 is the mirror reflection. Levels at least max_source wide are
+    box-filtered: Babylon's lobe there is only a texel or two across. The
+    rest are GGX-filtered at the alpha the shader picks for them, sampling a
+    box-filtered copy of the cube up to max_source per face.
+    """
+    size = faces.shape[1]
+    levels = int(math.log2(size))
+
+    sources = {size: faces}
+    while min(sources) > 1:
+        smallest = min(sources)
+        sources[smallest // 2] = downsample_cube(sources[smallest])
+
+    mips = [faces]
+    for level in range(1, levels + 1):
+        out_size = size >> level
+        if out_size >= max_source:
+            mips.append(sources[out_size])
+            continue
+        alpha = mip_alpha(level, size, lod_scale)
+        src = sources[min(size, max_source, max(8, out_size * 4))]
+        s = src.shape[1]
+        filtered = _ggx_filter(
+            face_directions(out_size).reshape(-1, 3).astype(np.float32),
+            face_directions(s).reshape(-1, 3).astype(np.float32),
+            src.reshape(-1, src.shape[-1]),
+            np.tile(texel_solid_angles(s).ravel(), 6),
+            alpha,
+        )
+        mips.append(filtered.reshape(6, out_size, out_size, -1))
+    return mips
+
+
+# ── Irradiance ───────────────────────────────────────────────
+
+
+def spherical_harmonics(faces):
+    """Project cube faces onto 9 SH coefficients, shaped (9, 3)."""
+    size = faces.shape[1]
+    dirs = face_directions(size).reshape(-1, 3)
+    x, y, z = dirs[:, 0], dirs[:, 1], dirs[:, 2]
+    basis = np.stack([
+        np.ones_like(x), y, z, x,
+        x * y, y * z, 3 * z * z - 1, x * z, x * x - y * y,
+    ], axis=1) * _SH_CONSTANTS
+
+    solid_angle = np.tile(texel_solid_angles(size).ravel(), 6)
+    radiance = np.minimum(faces.reshape(-1, faces.shape[-1])[:, :3], 4096)
+    coefficients = basis.T @ (radiance * solid_angle[:, None])
+    return coefficients * (4 * math.pi / solid_angle.sum())
+
+
+def spherical_polynomial(harmonics):
+    """
+    Babylon's SphericalPolynomial (x, y, z, xx, yy, zz, yz, zx, xy) from
+    incident-radiance harmonics, as stored in the .env irradiance block.
+    """
+    # Incident radiance -> irradiance -> Lambertian radiance
+    sh = harmonics * _SH_COSINE_KERNEL[:, None] / math.pi
+    l00, l1_1, l10, l11, l2_2, l2_1, l20, l21, l22 = sh
+    poly = {
+        "x": -1.02333 * l11,
+        "y": -1.02333 * l1_1,
+        "z": 1.02333 * l10,
+        "xx": 0.886277 * l00 - 0.247708 * l20 + 0.429043 * l22,
+        "yy": 0.886277 * l00 - 0.247708 * l20 - 0.429043 * l22,
+        "zz": 0.886277 * l00 + 0.495417 * l20,
+        "yz": -0.858086 * l2_1,
+        "zx": -0.858086 * l21,
+        "xy": 0.858086 * l2_2,
+    }
+    return {key: (value / math.pi).tolist() for key, value in poly.items()}
+
+
+# ── Encoding ─────────────────────────────────────────────────
+
+
+def rgbd_encode(rgb):
+    """Encode linear HDR RGB as RGBD bytes (Babylon's toRGBD)."""
+    max_rgb = np.maximum(rgb.max(axis=-1, keepdims=True), 1e-6)
+    d = np.maximum(RGBD_MAX_RANGE / max_rgb, 1.0)
+    d = np.clip(np.floor(d) / 255.0, 0, 1)
+    encoded = np.clip((rgb * d) ** (1 / GAMMA), 0, 1)
+    rgba = np.concatenate([encoded, d], axis=-1)
+    return np.round(rgba * 255).astype(np.uint8)
+
+
+def build_env(equirect, size=256, lod_scale=LOD_GENERATION_SCALE):
+    """
+    Bake a linear float equirectangular image (rows top to bottom) into .env
+    bytes. Returns (data, info) where info is the JSON header.
+    """
+    if size & (size - 1):
+        raise ValueError("Cube size must be a power of two")
+    faces = equirect_to_cube(equirect[..., :3].astype(np.float32), size)
+    mips = prefilter_specular(faces, lod_scale)
+    harmonics = spherical_harmonics(downsample_cube(faces) if size > 64 else faces)
+
+    images = []
+    for mip in mips:
+        for face in range(6):
+            images.append(encode_png(rgbd_encode(mip[face][..., :3])))
+
+    info = {
+        "version": 1,
+        "width": size,
+        "imageType": "image/png",
+        "irradiance": spherical_polynomial(harmonics),
+        "specular": {"mipmaps": [], "lodGenerationScale": lod_scale},
+    }
+    position = 0
+    for image in images:
+        info["specular"]["mipmaps"].append({"length": len(image), "position": position})
+        position += len(image)
+
+    header = json.dumps(info, separators=(",", ":")).encode("ascii") + b"\0"
+    return ENV_MAGIC + header + b"".join(images), info
@@ -0,0 +1,356 @@
+"""
+GLB container I/O.
+
+A Glb holds the glTF JSON as a plain dict and the BIN chunk as a memoryview
+over the file bytes, so accessors are read as zero-copy NumPy views. Edited
+buffer views are kept as overrides and only materialized when the file is
+written, at which point the buffer is compacted down to the views that are
+still referenced.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+DTYPE_COMPONENTS = {np.dtype(v): k for k, v in COMPONENT_DTYPES.items()}
+
+TYPE_SIZES = {
+    "SCALAR": 1,
+    "VEC2": 2,
+    "VEC3": 3,
+    "VEC4": 4,
+    "MAT2": 4,
+    "MAT3": 9,
+    "MAT4": 16,
+}
+SIZE_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+
+class GlbError(ValueError):
+    """Raised for files this module cannot read or write."""
+
+
+def _pad4(length):
+    return (4 - length % 4) % 4
+
+
+def _component_array(array):
+    """
+    array as a contiguous (count, components) array of a glTF component type.
+    float64 is narrowed to float32; any other unmapped dtype raises GlbError.
+    """
+    array = np.ascontiguousarray(array)
+    if array.dtype == np.float64:
+        array = array.astype(np.float32)
+    if array.dtype not in DTYPE_COMPONENTS:
+        raise GlbError(f"No glTF component type for dtype {array.dtype}")
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    return array
+
+
+class Glb:
+    def __init__(self, gltf, bin_chunk=None):
+        self.json = gltf
+        self.bin = memoryview(bin_chunk if bin_chunk is not None else b"")
+        self._overrides = {}
+
+    # ── Loading / saving ─────────────────────────────────────
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
+
+    @classmethod
+    def loads(cls, data):
+        view = memoryview(data)
+        if len(view) < 12:
+            raise GlbError("File too short for a GLB header")
+        magic, version, length = struct.unpack_from("<III", view, 0)
+        if magic != GLB_MAGIC:
+            raise GlbError("Not a GLB file (bad magic)")
+        if version != 2:
+            raise GlbError(f"Unsupported GLB version {version}")
+
+        gltf = None
+        bin_chunk = None
+        offset = 12
+        while offset < min(length, len(view)):
+            if offset + 8 > len(view):
+                raise GlbError("GLB is truncated inside a chunk header")
+            chunk_length, chunk_type = struct.unpack_from("<II", view, offset)
+            chunk = view[offset + 8:offset + 8 + chunk_length]
+            if len(chunk) < chunk_length:
+                raise GlbError("GLB is truncated inside a chunk")
+            if chunk_type == CHUNK_JSON:
+                try:
+                    gltf = json.loads(bytes(chunk))
+                except ValueError as e:
+                    raise GlbError(f"GLB JSON chunk is not valid JSON: {e}") from None
+            elif chunk_type == CHUNK_BIN and bin_chunk is None:
+                bin_chunk = chunk
+            offset += 8 + chunk_length
+
+        if gltf is None:
+            raise GlbError("GLB has no JSON chunk")
+        return cls(gltf, bin_chunk)
+
+    def save(self, path):
+        data = self.dumps()
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+    def dumps(self):
+        """Compact the buffer and serialize to GLB bytes."""
+        bin_data = self.compact()
+        json_data = json.dumps(self.json, separators=(",", ":")).encode("utf-8")
+        json_data += b" " * _pad4(len(json_data))
+
+        length = 12 + 8 + len(json_data)
+        if bin_data:
+            length += 8 + len(bin_data)
+
+        out = bytearray()
+        out += struct.pack("<III", GLB_MAGIC, 2, length)
+        out += struct.pack("<II", len(json_data), CHUNK_JSON)
+        out += json_data
+        if bin_data:
+            out += struct.pack("<II", len(bin_data), CHUNK_BIN)
+            out += bin_data
+        return bytes(out)
+
+    # ── Buffer views ─────────────────────────────────────────
+
+    def view_bytes(self, index):
+        """Raw bytes of a buffer view as a memoryview (no copy)."""
+        if index in self._overrides:
+            return self._overrides[index]
+        view = self.json["bufferViews"][index]
+        if view.get("buffer", 0) != 0 or "uri" in self.json["buffers"][view.get("buffer", 0)]:
+            raise GlbError(f"bufferView {index} does not live in the GLB BIN chunk")
+        start = view.get("byteOffset", 0)
+        return self.bin[start:start + view["byteLength"]]
+
+    def set_view_bytes(self, index, data):
+        data = memoryview(data).cast("B")
+        self._overrides[index] = data
+        self.json["bufferViews"][index]["byteLength"] = len(data)
+
+    def add_view(self, data, target=None, byte_stride=None):
+        """Append a buffer view holding data and return its index."""
+        views = self.json.setdefault("bufferViews", [])
+        view = {"buffer": 0, "byteLength": 0}
+        if target is not None:
+            view["target"] = target
+        if byte_stride is not None:
+            view["byteStride"] = byte_stride
+        views.append(view)
+        index = len(views) - 1
+        self.set_view_bytes(index, data)
+        return index
+
+    # ── Accessors ────────────────────────────────────────────
+
+    def read_accessor(self, index):
+        """
+        Read an accessor as a read-only NumPy array shaped (count, components).
+
+        Tightly packed and interleaved views are returned as views over the
+        buffer; normalized integer data is returned as stored. Sparse
+        accessors are densified into a copy (base values, or zeros, with the
+        sparse values written over them).
+        """
+        accessor = self.json["accessors"][index]
+        dtype, components = self._element(accessor, f"Accessor {index}")
+        count = accessor["count"]
+        if "bufferView" in accessor:
+            array = self._read_view(accessor["bufferView"], accessor.get("byteOffset", 0), count,
+                                    dtype, components, f"Accessor {index}")
+        else:
+            array = np.zeros((count, components), dtype=dtype)
+
+        sparse = accessor.get("sparse")
+        if sparse:
+            array = self._densify(index, array, sparse, dtype, components)
+        array.flags.writeable = False
+        return array
+
+    def _element(self, accessor, what):
+        component_type = accessor.get("componentType")
+        if component_type not in COMPONENT_DTYPES:
+            raise GlbError(f"{what} has unsupported componentType {component_type}")
+        if accessor.get("type") not in TYPE_SIZES:
+            raise GlbError(f"{what} has unsupported type {accessor.get('type')}")
+        return np.dtype(COMPONENT_DTYPES[component_type]), TYPE_SIZES[accessor["type"]]
+
+    def _read_view(self, view_index, offset, count, dtype, components, what, packed=False):
+        view = self.json["bufferViews"][view_index]
+        data = self.view_bytes(view_index)
+        element_size = dtype.itemsize * components
+        stride = element_size if packed else view.get("byteStride") or element_size
+        if count and offset + stride * (count - 1) + element_size > len(data):
+            raise GlbError(f"{what} overruns its buffer view")
+        return np.ndarray(
+            shape=(count, components),
+            dtype=dtype,
+            buffer=data,
+            offset=offset,
+            strides=(stride, dtype.itemsize),
+        )
+
+    def _densify(self, index, base, sparse, dtype, components):
+        what = f"Sparse accessor {index}"
+        count = sparse["count"]
+        indices_info, values_info = sparse["indices"], sparse["values"]
+        index_dtype = COMPONENT_DTYPES.get(indices_info.get("componentType"))
+        if index_dtype not in (np.uint8, np.uint16, np.uint32):
+            raise GlbError(f"{what} has unsupported index componentType {indices_info.get('componentType')}")
+
+        # Sparse indices and values are always tightly packed
+        indices = self._read_view(indices_info["bufferView"], indices_info.get("byteOffset", 0), count,
+                                  np.dtype(index_dtype), 1, f"{what} indices", packed=True).ravel()
+        values = self._read_view(values_info["bufferView"], values_info.get("byteOffset", 0), count,
+                                 dtype, components, f"{what} values", packed=True)
+        if count and int(indices.max()) >= len(base):
+            raise GlbError(f"{what} indexes past its count of {len(base)}")
+
+        dense = np.array(base, dtype=dtype)
+        dense[indices] = values
+        return dense
+
+    def write_accessor(self, index, array, target=None):
+        """
+        Replace an accessor's data with array, stored in a fresh packed view.
+
+        The old view stays in place until compaction drops it if nothing
+        else references it.
+        """
+        accessor = self.json["accessors"][index]
+        array = _component_array(array)
+        component_type = DTYPE_COMPONENTS[array.dtype]
+
+        old_view = accessor.get("bufferView")
+        if target is None and old_view is not None:
+            target = self.json["bufferViews"][old_view].get("target")
+
+        # Vertex attribute elements must start on 4-byte boundaries
+        element_size = array.dtype.itemsize * array.shape[1]
+        byte_stride = None
+        data = array.tobytes()
+        if target == TARGET_ARRAY_BUFFER and element_size % 4:
+            byte_stride = element_size + _pad4(element_size)
+            padded = np.zeros((len(array), byte_stride), dtype=np.uint8)
+            padded[:, :element_size] = np.frombuffer(data, dtype=np.uint8).reshape(len(array), element_size)
+            data = padded.tobytes()
+
+        accessor["bufferView"] = self.add_view(data, target=target, byte_stride=byte_stride)
+        accessor["byteOffset"] = 0
+        accessor["componentType"] = component_type
+        accessor["count"] = len(array)
+        accessor.pop("sparse", None)  # the new data is dense
+        if array.shape[1] in SIZE_TYPES and TYPE_SIZES[accessor["type"]] != array.shape[1]:
+            accessor["type"] = SIZE_TYPES[array.shape[1]]
+        if "min" in accessor or "max" in accessor:
+            if len(array):
+                accessor["min"] = array.min(axis=0).tolist()
+                accessor["max"] = array.max(axis=0).tolist()
+        return accessor
+
+    def add_accessor(self, array, accessor_type=None, target=None, normalized=False):
+        """Append an accessor holding array and return its index."""
+        array = _component_array(array)
+        if accessor_type is None and array.shape[1] not in SIZE_TYPES:
+            raise GlbError(f"No glTF accessor type for {array.shape[1]} components")
+        accessors = self.json.setdefault("accessors", [])
+        accessor = {
+            "componentType": DTYPE_COMPONENTS[array.dtype],
+            "count": 0,
+            "type": accessor_type or SIZE_TYPES[array.shape[1]],
+        }
+        if normalized:
+            accessor["normalized"] = True
+        accessors.append(accessor)
+        index = len(accessors) - 1
+        self.write_accessor(index, array, target=target)
+        return index
+
+    # ── Compaction ───────────────────────────────────────────
+
+    def used_views(self):
+        """Indices of buffer views referenced by accessors or images."""
+        used = set()
+        for accessor in self.json.get("accessors", []):
+            if "bufferView" in accessor:
+                used.add(accessor["bufferView"])
+            sparse = accessor.get("sparse")
+            if sparse:
+                used.add(sparse["indices"]["bufferView"])
+                used.add(sparse["values"]["bufferView"])
+        for image in self.json.get("images", []):
+            if "bufferView" in image:
+                used.add(image["bufferView"])
+        return used
+
+    def compact(self):
+        """
+        Drop unreferenced buffer views and rebuild the BIN chunk.
+
+        Returns the new BIN chunk bytes and rewrites bufferViews, buffers and
+        every reference to a view index to match.
+        """
+        views = self.json.get("bufferViews", [])
+        used = sorted(self.used_views())
+        remap = {old: new for new, old in enumerate(used)}
+
+        out = bytearray()
+        new_views = []
+        for old in used:
+            data = self.view_bytes(old)
+            out += b"\0" * _pad4(len(out))
+            view = dict(views[old])
+            view["buffer"] = 0
+            view["byteOffset"] = len(out)
+            view["byteLength"] = len(data)
+            out += data
+            new_views.append(view)
+        out += b"\0" * _pad4(len(out))
+
+        for accessor in self.json.get("accessors", []):
+            if "bufferView" in accessor:
+                accessor["bufferView"] = remap[accessor["bufferView"]]
+            sparse = accessor.get("sparse")
+            if sparse:
+                sparse["indices"]["bufferView"] = remap[sparse["indices"]["bufferView"]]
+                sparse["values"]["bufferView"] = remap[sparse["values"]["bufferView"]]
+        for image in self.json.get("images", []):
+            if "bufferView" in image:
+                image["bufferView"] = remap[image["bufferView"]]
+
+        if new_views:
+            self.json["bufferViews"] = new_views
+            self.json["buffers"] = [{"byteLength": len(out)}]
+        else:
+            self.json.pop("bufferViews", None)
+            self.json.pop("buffers", None)
+
+        self.bin = memoryview(bytes(out))
+        self._overrides = {}
+        return self.bin
@@ -0,0 +1,39 @@
+"""
+KTX2 (Basis Universal) encoding through KTX-Software's toktx.
+
+toktx is an optional dependency: https://github.com/KhronosGroup/KTX-Software.
+The textures are encoded as UASTC with a full mip chain, which Babylon's
+KTX2 loader transcodes to ASTC, BC7 or ETC2 depending on the device.
+"""
+
+import shutil
+import subprocess
+
+
+def find_toktx():
+    return shutil.which("toktx")
+
+
+def encode_ktx2(src, dst, srgb=True, normal_map=False, quality=2, zstd_level=18):
+    """
+    Encode an 8-bit PNG to a mip-mapped UASTC KTX2 file.
+
+    srgb marks the RGB channels as sRGB (alpha is always linear), so color
+    maps can pack linear data such as roughness in alpha. normal_map stores
+    X/Y only, with Z reconstructed in the shader.
+    """
+    toktx = find_toktx()
+    if not toktx:
+        raise FileNotFoundError("toktx not found on PATH (install KTX-Software)")
+    cmd = [
+        toktx, "--t2",
+        "--encode", "uastc",
+        "--uastc_quality", str(quality),
+        "--zcmp", str(zstd_level),
+        "--genmipmap",
+        "--assign_oetf", "srgb" if srgb else "linear",
+    ]
+    if normal_map:
+        cmd.append("--normal_mode")
+    cmd += [dst, src]
+    subprocess.run(cmd, check=True)
@@ -0,0 +1,170 @@
+"""
+Generated asset manifest.
+
+Lists every pipeline-produced model and sprite under public/assets with its
+byte size, content hash, dependencies and preload tier, so web and Capacitor
+builds can prefetch in priority order and cache by content hash. Written to
+public/assets/manifest.json after each convert/export/render run.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+
+from .delta import update_patches
+from .glb import Glb, GlbError
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+TIERS = ("splash", "menu", "gameplay", "lazy")
+
+# Files the pipeline produces, relative to public/
+ASSET_PATTERNS = (
+    "assets/models/*.glb",
+    "assets/models/*.vat.json",
+    "assets/sprites/*.png",
+    "assets/sprites/*.json",
+    "assets/backgrounds/*.png",
+    "assets/environment/*.env",
+    "assets/environment/*.ktx2",
+)
+
+# First match wins; paths are relative to public/
+TIER_RULES = (
+    ("assets/models/*.*.glb", "lazy"),  # animation chunks split out of a base GLB
+    ("assets/backgrounds/menu_*", "splash"),
+    ("assets/models/farmers/*.glb", "menu"),
+    ("assets/sprites/farmer_*_portrait.png", "menu"),
+    # The menu's peeking animals load the same models as gameplay
+    ("assets/models/animals/*.glb", "menu"),
+    # convert_fbx_to_glb.py writes animals straight into models/; with the
+    # farmer/animal rules above, this only catches those top-level files
+    ("assets/models/*.glb", "menu"),
+    ("assets/environment/*", "gameplay"),
+    ("assets/sprites/*_portrait.png", "gameplay"),
+)
+DEFAULT_TIER = "lazy"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tier_for(rel_path):
+    for pattern, tier in TIER_RULES:
+        if fnmatch.fnmatch(rel_path, pattern):
+            return tier
+    return DEFAULT_TIER
+
+
+def _matches(rel_path):
+    # fnmatch's * also crosses "/", so models/*.glb covers every subdirectory
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in ASSET_PATTERNS)
+
+
+def _resolve(rel_dir, uri):
+    return os.path.normpath(os.path.join(rel_dir, uri)).replace(os.sep, "/")
+
+
+def glb_dependencies(path, rel_dir):
+    """External files a GLB references (buffer and image URIs)."""
+    try:
+        gltf = Glb.load(path).json
+    except GlbError as e:
+        print(f"  WARNING: {path}: {e}")
+        return []
+    deps = []
+    for entry in gltf.get("buffers", []) + gltf.get("images", []):
+        uri = entry.get("uri")
+        if uri and not uri.startswith("data:"):
+            deps.append(_resolve(rel_dir, uri))
+    return deps
+
+
+def json_dependencies(path, rel_dir):
+    """Sidecar JSON files (*.vat.json, sprite strips) pair with a payload of the same stem."""
+    deps = []
+    stem = os.path.basename(path)[:-len(".json")]
+    if path.endswith(".vat.json"):
+        deps.append(_resolve(rel_dir, stem + ".bin"))
+    elif rel_dir.endswith("sprites/strips"):
+        deps.append(_resolve(rel_dir, stem + ".png"))
+    return deps
+
+
+def build_manifest(public_dir):
+    """Scan public_dir and return the manifest dict."""
+    assets = []
+    for dirpath, _, filenames in os.walk(os.path.join(public_dir, "assets")):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(path, public_dir).replace(os.sep, "/")
+            if not _matches(rel_path):
+                continue
+            rel_dir = os.path.dirname(rel_path)
+
+            if filename.endswith(".glb"):
+                deps = glb_dependencies(path, rel_dir)
+            elif filename.endswith(".json"):
+                deps = json_dependencies(path, rel_dir)
+            else:
+                deps = []
+
+            # Dependencies that are themselves produced files get their own entry
+            entries = [(rel_path, path)] + [(dep, os.path.join(public_dir, dep)) for dep in deps]
+            for index, (entry_path, entry_file) in enumerate(entries):
+                if not os.path.exists(entry_file):
+                    print(f"  WARNING: {rel_path} references missing {entry_path}")
+                    continue
+                sha = file_hash(entry_file)
+                assets.append({
+                    "path": entry_path,
+                    "bytes": os.path.getsize(entry_file),
+                    "sha256": sha,
+                    "hash": sha[:16],
+                    "tier": tier_for(rel_path),
+                    "dependencies": deps if index == 0 else [],
+                })
+
+    # A dependency shared by several assets is listed once, at its earliest tier
+    unique = {}
+    for asset in assets:
+        current = unique.get(asset["path"])
+        if current is None or TIERS.index(asset["tier"]) < TIERS.index(current["tier"]):
+            unique[asset["path"]] = asset
+    assets = sorted(unique.values(), key=lambda a: (TIERS.index(a["tier"]), a["path"]))
+
+    tiers = {}
+    for tier in TIERS:
+        members = [a for a in assets if a["tier"] == tier]
+        tiers[tier] = {"count": len(members), "bytes": sum(a["bytes"] for a in members)}
+
+    return {"version": MANIFEST_VERSION, "tiers": tiers, "assets": assets}
+
+
+def write_manifest(public_dir, path=None, patches=True):
+    """
+    Build and write the manifest; returns the manifest dict. With patches,
+    changed GLBs and sprites also get binary deltas (see delta.py).
+    """
+    manifest = build_manifest(public_dir)
+    path = path or os.path.join(public_dir, "assets", MANIFEST_NAME)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+    total = sum(a["bytes"] for a in manifest["assets"])
+    print(f"Manifest: {len(manifest['assets'])} assets, {total} bytes -> {path}")
+    for tier, info in manifest["tiers"].items():
+        if info["count"]:
+            print(f"  {tier}: {info['count']} assets, {info['bytes']} bytes")
+
+    if patches:
+        update_patches(public_dir, manifest)
+    return manifest
@@ -0,0 +1,130 @@
+"""
+Material signatures and de-duplication across GLBs.
+
+Babylon compiles one effect per distinct set of shader defines, which come
+from the material's parameters and texture slots plus the primitive's vertex
+layout (vertex colors, skinning, morph targets). Two animals whose materials
+differ only by name share an effect, but ones that differ by a roughness
+value or an extra texture slot do not. The "shader signature" is that
+combination, with names, extras and specific texture indices left out.
+report_signatures() counts unique signatures across every model so a stray
+material shows up as an extra shader compile at first spawn.
+
+dedupe_materials() is a transform that merges materials within one GLB that
+are identical apart from their name.
+"""
+
+import hashlib
+import json
+
+from .glb import Glb, GlbError
+
+_IGNORED_KEYS = ("name", "extras")
+
+
+def _without_ignored(material):
+    return {k: v for k, v in material.items() if k not in _IGNORED_KEYS}
+
+
+def _texture_slots(value):
+    """Replace texture references by their slot shape (texCoord, scale...) only."""
+    if isinstance(value, dict):
+        if "index" in value and isinstance(value["index"], int):
+            slot = {k: _texture_slots(v) for k, v in value.items() if k != "index"}
+            slot["texture"] = True
+            return slot
+        return {k: _texture_slots(v) for k, v in value.items() if k not in _IGNORED_KEYS}
+    if isinstance(value, list):
+        return [_texture_slots(v) for v in value]
+    return value
+
+
+def _digest(value):
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def shader_signature(gltf, primitive):
+    """Signature of the effect Babylon would compile for one primitive."""
+    materials = gltf.get("materials", [])
+    material = materials[primitive["material"]] if "material" in primitive else {}
+    return _digest({
+        "material": _texture_slots(material),
+        "attributes": sorted(primitive.get("attributes", {})),
+        "targets": len(primitive.get("targets", [])),
+        "mode": primitive.get("mode", 4),
+    })
+
+
+def material_signatures(glb):
+    """{signature: [material names]} for every primitive in glb."""
+    gltf = glb.json
+    signatures = {}
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            name = gltf["materials"][primitive["material"]].get("name", "?") if "material" in primitive else "(default)"
+            names = signatures.setdefault(shader_signature(gltf, primitive), [])
+            if name not in names:
+                names.append(name)
+    return signatures
+
+
+def report_signatures(paths, display=str):
+    """
+    Print the unique shader signatures across paths and which files use each.
+    Files that aren't readable GLBs are reported and left out. Returns
+    ({signature: {"materials": [...], "files": [...]}}, [unreadable paths]).
+    """
+    combined = {}
+    failed = []
+    meshed = 0
+    for path in paths:
+        try:
+            signatures = material_signatures(Glb.load(path))
+        except GlbError as e:
+            # e.g. a Git LFS pointer; the report (and the manifest after it) still run
+            failed.append(path)
+            print(f"  WARNING: {display(path)}: {e}")
+            continue
+        meshed += bool(signatures)
+        for signature, names in signatures.items():
+            entry = combined.setdefault(signature, {"materials": [], "files": []})
+            entry["materials"].extend(n for n in names if n not in entry["materials"])
+            entry["files"].append(display(path))
+
+    print(f"Material signatures: {len(combined)} unique across {meshed} GLBs with meshes")
+    for signature, entry in sorted(combined.items(), key=lambda item: -len(item[1]["files"])):
+        print(f"  {signature}  {', '.join(entry['materials'])}  ({len(entry['files'])} files)")
+        if len(combined) > 1:
+            for path in entry["files"]:
+                print(f"      {path}")
+    if failed:
+        print(f"  {len(failed)} unreadable GLBs skipped")
+    return combined, failed
+
+
+def dedupe_materials(glb):
+    """Merge materials identical apart from name/extras; returns how many were dropped."""
+    gltf = glb.json
+    materials = gltf.get("materials", [])
+    if not materials:
+        return 0
+
+    first_by_key = {}
+    remap = {}
+    for index, material in enumerate(materials):
+        key = json.dumps(_without_ignored(material), sort_keys=True)
+        remap[index] = first_by_key.setdefault(key, index)
+
+    used = sorted({remap[p["material"]] for mesh in gltf.get("meshes", [])
+                   for p in mesh["primitives"] if "material" in p})
+    compact = {old: new for new, old in enumerate(used)}
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            if "material" in primitive:
+                primitive["material"] = compact[remap[primitive["material"]]]
+
+    gltf["materials"] = [materials[i] for i in used]
+    if not gltf["materials"]:
+        del gltf["materials"]
+    return len(materials) - len(used)
@@ -0,0 +1,322 @@
+"""
+Vertex cache, overdraw and vertex fetch optimization for GLB meshes.
+
+The FBX importer leaves index and vertex buffers in arbitrary order. For each
+triangle primitive this pass:
+
+  1. welds vertices whose attributes (and morph target deltas) are identical,
+  2. reorders triangles for post-transform cache reuse (Tipsify, Sander et al.
+     2007),
+  3. sorts cache-friendly clusters of triangles front-to-back by outward
+     facing to cut overdraw, keeping the result only while ACMR stays within
+     a threshold of step 2,
+  4. renumbers vertices in first-use order for fetch locality.
+
+ACMR (average cache miss ratio: transformed vertices per triangle for a FIFO
+cache) is reported before and after.
+"""
+
+import time
+
+import numpy as np
+
+from .glb import TARGET_ARRAY_BUFFER, TARGET_ELEMENT_ARRAY_BUFFER, Glb, GlbError
+from .transforms import prune_accessors
+
+CACHE_SIZE = 16
+OVERDRAW_THRESHOLD = 1.05
+MODE_TRIANGLES = 4
+
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    """Average cache miss ratio of an index list for a FIFO cache."""
+    triangles = len(indices) // 3
+    if not triangles:
+        return 0.0
+    stamp = {}
+    time_now = 0
+    misses = 0
+    for v in indices.tolist():
+        if time_now - stamp.get(v, -cache_size - 1) > cache_size:
+            stamp[v] = time_now
+            time_now += 1
+            misses += 1
+    return misses / triangles
+
+
+def weld(attributes):
+    """
+    Merge vertices that are byte-identical across every attribute.
+
+    attributes is a list of (count, n) arrays sharing the vertex count.
+    Returns (remap, first): remap maps old to new vertex ids, numbered in
+    order of first appearance, and first[new] is that vertex's first old id.
+    """
+    count = len(attributes[0])
+    rows = np.hstack([np.ascontiguousarray(a).view(np.uint8).reshape(count, -1) for a in attributes])
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    # np.unique sorts by value; renumber by first occurrence to keep the original order stable
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.ravel()], first[order]
+
+
+def tipsify(indices, vertex_count, cache_size=CACHE_SIZE):
+    """Return the triangle order produced by Tipsify for a cache of cache_size."""
+    triangles = indices.reshape(-1, 3)
+    tri_count = len(triangles)
+    if not tri_count:
+        return np.zeros(0, dtype=np.int64)
+
+    # Vertex -> triangle adjacency as a CSR array
+    flat = indices.astype(np.int64)
+    live = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate([[0], np.cumsum(live)]).tolist()
+    adjacency = (np.argsort(flat, kind="stable") // 3).tolist()
+    live = live.tolist()
+    tris = triangles.tolist()
+
+    cache_time = [0] * vertex_count
+    emitted = [False] * tri_count
+    dead_end = []
+    out = []
+    stamp = cache_size + 1
+    cursor = 0
+    fan = int(flat[0])
+
+    while fan >= 0:
+        candidates = []
+        for t in adjacency[offsets[fan]:offsets[fan + 1]]:
+            if emitted[t]:
+                continue
+            for v in tris[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if stamp - cache_time[v] > cache_size:
+                    cache_time[v] = stamp
+                    stamp += 1
+            emitted[t] = True
+            out.append(t)
+
+        # Next fanning vertex: the candidate that stays in cache longest
+        best, best_priority = -1, -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if stamp - cache_time[v] + 2 * live[v] <= cache_size:
+                    priority = stamp - cache_time[v]
+                if priority > best_priority:
+                    best, best_priority = v, priority
+
+        if best == -1:
+            while dead_end and best == -1:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    best = v
+            while best == -1 and cursor < vertex_count:
+                if live[cursor] > 0:
+                    best = cursor
+                cursor += 1
+        fan = best
+
+    return np.array(out, dtype=np.int64)
+
+
+def _clusters(indices, cache_size):
+    """Split points where a triangle misses on all three vertices (a cache restart)."""
+    stamp = {}
+    time_now = 0
+    starts = [0]
+    for t, tri in enumerate(indices.reshape(-1, 3).tolist()):
+        misses = 0
+        for v in tri:
+            if time_now - stamp.get(v, -cache_size - 1) > cache_size:
+                stamp[v] = time_now
+                time_now += 1
+                misses += 1
+        if misses == 3 and t:
+            starts.append(t)
+    return starts
+
+
+def sort_overdraw(indices, positions, cache_size=CACHE_SIZE, threshold=OVERDRAW_THRESHOLD):
+    """
+    Reorder cache-optimized triangle clusters so outward-facing clusters on
+    the hull are drawn first. Returns the original order if ACMR would grow
+    by more than threshold.
+    """
+    triangles = indices.reshape(-1, 3)
+    starts = _clusters(indices, cache_size)
+    if len(starts) < 2:
+        return indices
+
+    corners = positions[triangles].astype(np.float64)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])  # area-weighted
+    areas = np.linalg.norm(normals, axis=1)
+    centroids = corners.mean(axis=1)
+    mesh_center = (centroids * areas[:, None]).sum(axis=0) / max(areas.sum(), 1e-12)
+
+    bounds = starts + [len(triangles)]
+    keys = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        normal = normals[start:end].sum(axis=0)
+        length = np.linalg.norm(normal)
+        area = areas[start:end].sum()
+        center = (centroids[start:end] * areas[start:end, None]).sum(axis=0) / max(area, 1e-12)
+        keys.append(float(np.dot(center - mesh_center, normal / length)) if length > 0 else 0.0)
+
+    order = sorted(range(len(keys)), key=lambda c: -keys[c])
+    sorted_indices = np.concatenate([triangles[bounds[c]:bounds[c + 1]] for c in order]).ravel()
+    if acmr(sorted_indices, cache_size) > acmr(indices, cache_size) * threshold:
+        return indices
+    return sorted_indices
+
+
+def fetch_remap(indices, vertex_count):
+    """Old -> new vertex ids in order of first use by the index buffer."""
+    remap = np.full(vertex_count, -1, dtype=np.int64)
+    _, first = np.unique(indices, return_index=True)
+    used = indices[np.sort(first)]
+    remap[used] = np.arange(len(used))
+    return remap, len(used)
+
+
+def optimize_indices(indices, positions, vertex_count, cache_size=CACHE_SIZE):
+    """Cache + overdraw triangle order for an index list (vertices unchanged)."""
+    tri_order = tipsify(indices, vertex_count, cache_size)
+    indices = indices.reshape(-1, 3)[tri_order].ravel()
+    return sort_overdraw(indices, positions, cache_size)
+
+
+# ── GLB integration ──────────────────────────────────────────
+
+
+def _new_accessor(glb, old_index, array, target):
+    """Add an accessor holding array that keeps old_index's type and flags."""
+    old = glb.json["accessors"][old_index]
+    index = glb.add_accessor(array, accessor_type=old["type"], target=target, normalized=old.get("normalized", False))
+    accessor = glb.json["accessors"][index]
+    if "name" in old:
+        accessor["name"] = old["name"]
+    if "min" in old and len(array):
+        accessor["min"] = array.min(axis=0).tolist()
+        accessor["max"] = array.max(axis=0).tolist()
+    return index
+
+
+def _skip_reason(glb, primitive):
+    """Why a primitive can't be optimized, or None if it can."""
+    if primitive.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES:
+        return "not triangles"
+    if "POSITION" not in primitive["attributes"]:
+        return "no POSITION"
+    if "extensions" in primitive:
+        return "compressed"  # Draco and friends own their own layout
+    accessors = glb.json["accessors"]
+    referenced = list(primitive["attributes"].values()) + [a for t in primitive.get("targets", []) for a in t.values()]
+    if any("sparse" in accessors[index] for index in referenced):
+        # Rewriting would densify the morph targets the exporter kept sparse
+        return "sparse accessors"
+    return None
+
+
+def optimize_primitive(glb, primitive, cache_size=CACHE_SIZE):
+    """
+    Weld and reorder one triangle primitive. Returns stats, or a string
+    saying why the primitive was skipped.
+    """
+    reason = _skip_reason(glb, primitive)
+    if reason:
+        return reason
+
+    attr_names = sorted(primitive["attributes"])
+    try:
+        attrs = [glb.read_accessor(primitive["attributes"][name]) for name in attr_names]
+        targets = [[glb.read_accessor(t[name]) for name in sorted(t)] for t in primitive.get("targets", [])]
+        indices = glb.read_accessor(primitive["indices"]).ravel() if "indices" in primitive else None
+    except GlbError as e:
+        return str(e)
+    vertex_count = len(attrs[0])
+
+    if indices is not None:
+        indices = indices.astype(np.int64)
+    else:
+        indices = np.arange(vertex_count, dtype=np.int64)
+    if len(indices) < 3:
+        return "fewer than 3 indices"
+
+    before = acmr(indices, cache_size)
+
+    weld_map, first_of = weld(attrs + [a for t in targets for a in t])
+    welded_count = len(first_of)
+    indices = weld_map[indices]
+
+    positions = attrs[attr_names.index("POSITION")][first_of]
+    indices = optimize_indices(indices, positions, welded_count, cache_size)
+
+    remap, used_count = fetch_remap(indices, welded_count)
+    indices = remap[indices]
+    source = np.empty(used_count, dtype=np.int64)
+    source[remap[remap >= 0]] = first_of[remap >= 0]
+
+    after = acmr(indices, cache_size)
+
+    for name, data in zip(attr_names, attrs):
+        primitive["attributes"][name] = _new_accessor(glb, primitive["attributes"][name], data[source], TARGET_ARRAY_BUFFER)
+    for target, datas in zip(primitive.get("targets", []), targets):
+        for name, data in zip(sorted(target), datas):
+            target[name] = _new_accessor(glb, target[name], data[source], TARGET_ARRAY_BUFFER)
+
+    index_dtype = np.uint16 if used_count <= 0xFFFF else np.uint32
+    primitive["indices"] = glb.add_accessor(indices.astype(index_dtype), "SCALAR", TARGET_ELEMENT_ARRAY_BUFFER)
+
+    return {
+        "triangles": len(indices) // 3,
+        "vertices_before": vertex_count,
+        "vertices_after": used_count,
+        "acmr_before": before,
+        "acmr_after": after,
+    }
+
+
+def optimize_meshes(glb, cache_size=CACHE_SIZE):
+    """
+    Optimize every triangle primitive in glb and drop the replaced accessors.
+    Returns totals with triangle-weighted ACMR before and after.
+    """
+    totals = {"primitives": 0, "triangles": 0, "vertices_before": 0, "vertices_after": 0,
+              "acmr_before": 0.0, "acmr_after": 0.0}
+    for mesh in glb.json.get("meshes", []):
+        for index, primitive in enumerate(mesh["primitives"]):
+            stats = optimize_primitive(glb, primitive, cache_size)
+            if isinstance(stats, str):
+                print(f"    Skipped {mesh.get('name', 'mesh')} primitive {index}: {stats}")
+                continue
+            totals["primitives"] += 1
+            totals["triangles"] += stats["triangles"]
+            totals["vertices_before"] += stats["vertices_before"]
+            totals["vertices_after"] += stats["vertices_after"]
+            totals["acmr_before"] += stats["acmr_before"] * stats["triangles"]
+            totals["acmr_after"] += stats["acmr_after"] * stats["triangles"]
+
+    if totals["triangles"]:
+        totals["acmr_before"] /= totals["triangles"]
+        totals["acmr_after"] /= totals["triangles"]
+    prune_accessors(glb)
+    return totals
+
+
+def optimize_file(path, dst=None, cache_size=CACHE_SIZE):
+    """Optimize a GLB on disk and print its ACMR report. Returns the totals."""
+    start = time.perf_counter()
+    glb = Glb.load(path)
+    totals = optimize_meshes(glb, cache_size)
+    glb.save(dst or path)
+    totals["ms"] = (time.perf_counter() - start) * 1000
+    print(f"  Mesh opt {path}: {totals['triangles']} tris, "
+          f"verts {totals['vertices_before']} -> {totals['vertices_after']}, "
+          f"ACMR {totals['acmr_before']:.3f} -> {totals['acmr_after']:.3f} "
+          f"({totals['ms']:.0f} ms)")
+    return totals
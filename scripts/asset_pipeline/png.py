@@ -0,0 +1,42 @@
+"""
+Minimal PNG encoder for 8-bit images held in NumPy arrays.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}  # channels -> PNG color type
+
+
+def _chunk(kind, data):
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+def encode_png(pixels, level=6):
+    """
+    Encode a uint8 array shaped (height, width) or (height, width, channels),
+    rows top to bottom, as PNG bytes.
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    height, width, channels = pixels.shape
+    raw = np.zeros((height, width * channels + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = pixels.reshape(height, -1)
+    header = struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[channels], 0, 0, 0)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _chunk(b"IHDR", header),
+        _chunk(b"IDAT", zlib.compress(raw.tobytes(), level)),
+        _chunk(b"IEND", b""),
+    ])
+
+
+def write_png(path, pixels, level=6):
+    data = encode_png(pixels, level)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
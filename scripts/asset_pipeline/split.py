@@ -0,0 +1,118 @@
+"""
+Split animation clips out of a GLB so they can stream in after the mesh.
+
+The base file keeps the meshes, skins, materials and the clips needed for
+the first frame (idle by default). Every other clip is written to its own
+GLB chunk next to it, holding only the node hierarchy (names and rest
+transforms, no meshes or skins) and that clip's keyframes. Babylon's
+SceneLoader.ImportAnimationsAsync retargets a chunk onto the loaded base by
+node name.
+
+The base lists its chunks in asset.extras.animationChunks:
+
+    [{"name": "walk", "uri": "john.walk.glb", "byteLength": 48210,
+      "hash": "9f2c41d0aa3e7b15", "duration": 1.2}]
+"""
+
+import hashlib
+import os
+
+from .glb import Glb
+from .transforms import prune_accessors, set_extras
+
+DEFAULT_BASE_CLIPS = ("idle",)
+CHUNKS_KEY = "animationChunks"
+
+_NODE_KEYS = ("name", "children", "translation", "rotation", "scale", "matrix")
+
+
+def _clip_duration(glb, animation):
+    end = 0.0
+    for sampler in animation["samplers"]:
+        accessor = glb.json["accessors"][sampler["input"]]
+        if "max" in accessor:
+            end = max(end, accessor["max"][0])
+        else:
+            end = max(end, float(glb.read_accessor(sampler["input"]).max()))
+    return end
+
+
+def extract_clip(glb, animation):
+    """Build a standalone Glb holding the node hierarchy and one animation."""
+    gltf = glb.json
+    chunk = Glb({
+        "asset": {"version": "2.0", "generator": "asset_pipeline.split"},
+        "scene": gltf.get("scene", 0),
+        "scenes": [{k: v for k, v in scene.items() if k in ("name", "nodes")} for scene in gltf.get("scenes", [])],
+        "nodes": [{k: v for k, v in node.items() if k in _NODE_KEYS} for node in gltf.get("nodes", [])],
+        "animations": [],
+    })
+
+    copied = {}
+
+    def copy_accessor(index):
+        if index not in copied:
+            source = gltf["accessors"][index]
+            new_index = chunk.add_accessor(glb.read_accessor(index), accessor_type=source["type"],
+                                           normalized=source.get("normalized", False))
+            for key in ("min", "max"):
+                if key in source:
+                    chunk.json["accessors"][new_index][key] = source[key]
+            copied[index] = new_index
+        return copied[index]
+
+    samplers = []
+    for sampler in animation["samplers"]:
+        new_sampler = dict(sampler)
+        new_sampler["input"] = copy_accessor(sampler["input"])
+        new_sampler["output"] = copy_accessor(sampler["output"])
+        samplers.append(new_sampler)
+    chunk.json["animations"].append({
+        "name": animation.get("name"),
+        "channels": animation["channels"],
+        "samplers": samplers,
+    })
+    return chunk
+
+
+def split_animations(path, base_clips=DEFAULT_BASE_CLIPS):
+    """
+    Split path in place into a base GLB plus one <stem>.<clip>.glb per clip
+    not in base_clips. Returns the chunk index written to the base.
+    """
+    glb = Glb.load(path)
+    animations = glb.json.get("animations", [])
+    keep = [a for a in animations if a.get("name") in base_clips]
+    moved = [a for a in animations if a.get("name") not in base_clips]
+    if not moved:
+        print(f"  Split {os.path.basename(path)}: nothing to split")
+        return []
+
+    directory = os.path.dirname(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    index = []
+    for number, animation in enumerate(moved):
+        name = animation.get("name") or f"clip{number}"
+        uri = f"{stem}.{name}.glb"
+        data = extract_clip(glb, animation).dumps()
+        with open(os.path.join(directory, uri), "wb") as f:
+            f.write(data)
+        index.append({
+            "name": name,
+            "uri": uri,
+            "byteLength": len(data),
+            "hash": hashlib.sha256(data).hexdigest()[:16],
+            "duration": round(_clip_duration(glb, animation), 4),
+        })
+
+    if keep:
+        glb.json["animations"] = keep
+    else:
+        glb.json.pop("animations", None)
+    prune_accessors(glb)
+    set_extras(glb, {CHUNKS_KEY: index})
+    size = glb.save(path)
+
+    print(f"  Split {stem}.glb: base {size} bytes ({', '.join(a.get('name', '?') for a in keep) or 'no clips'}), "
+          + ", ".join(f"{c['name']} {c['byteLength']} bytes" for c in index))
+    return index
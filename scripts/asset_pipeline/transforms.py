@@ -0,0 +1,362 @@
+"""
+Post-export transforms that operate on a loaded Glb.
+
+Every transform is a plain function taking the Glb as its first argument and
+editing it in place. Chains are lists of callables (use functools.partial to
+bind options) passed to run(); the buffer is compacted once, when the result
+is written.
+"""
+
+import time
+
+import numpy as np
+
+from .glb import Glb
+
+# ── Scene graph helpers ──────────────────────────────────────
+
+
+def _quat_to_matrix(q):
+    x, y, z, w = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def local_matrix(node):
+    """4x4 local transform of a node (glTF matrices are column-major)."""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    m = np.identity(4)
+    m[:3, :3] = _quat_to_matrix(node.get("rotation", [0, 0, 0, 1])) * np.array(node.get("scale", [1, 1, 1]))
+    m[:3, 3] = node.get("translation", [0, 0, 0])
+    return m
+
+
+def parent_map(gltf):
+    parents = {}
+    for index, node in enumerate(gltf.get("nodes", [])):
+        for child in node.get("children", []):
+            parents[child] = index
+    return parents
+
+
+def scene_roots(gltf):
+    scenes = gltf.get("scenes", [])
+    if scenes:
+        return list(scenes[gltf.get("scene", 0)].get("nodes", []))
+    parents = parent_map(gltf)
+    return [i for i in range(len(gltf.get("nodes", []))) if i not in parents]
+
+
+def world_matrices(gltf):
+    """World matrix of every node reachable from the default scene."""
+    nodes = gltf.get("nodes", [])
+    world = {}
+    stack = [(root, np.identity(4)) for root in scene_roots(gltf)]
+    while stack:
+        index, parent = stack.pop()
+        world[index] = parent @ local_matrix(nodes[index])
+        stack.extend((child, world[index]) for child in nodes[index].get("children", []))
+    return world
+
+
+def _skinned_positions(glb, primitive, skin, world):
+    """Bind-pose positions of a skinned primitive, blended through its joints."""
+    gltf = glb.json
+    positions = glb.read_accessor(primitive["attributes"]["POSITION"]).astype(np.float64)
+    joint_worlds = np.array([world.get(j, np.identity(4)) for j in skin["joints"]])
+    if "inverseBindMatrices" in skin:
+        ibm = glb.read_accessor(skin["inverseBindMatrices"]).reshape(-1, 4, 4).transpose(0, 2, 1)
+        joint_worlds = joint_worlds @ ibm
+    homogeneous = np.hstack([positions, np.ones((len(positions), 1))])
+    result = np.zeros_like(positions)
+    for set_index in range(4):
+        joints_key, weights_key = f"JOINTS_{set_index}", f"WEIGHTS_{set_index}"
+        if joints_key not in primitive["attributes"]:
+            break
+        joints = glb.read_accessor(primitive["attributes"][joints_key]).astype(np.int64)
+        raw_weights = glb.read_accessor(primitive["attributes"][weights_key])
+        weights = raw_weights.astype(np.float64)
+        if gltf["accessors"][primitive["attributes"][weights_key]].get("normalized"):
+            weights /= np.iinfo(raw_weights.dtype).max
+        for k in range(joints.shape[1]):
+            moved = np.einsum("nij,nj->ni", joint_worlds[joints[:, k]], homogeneous)[:, :3]
+            result += weights[:, k:k + 1] * moved
+    return result
+
+
+def scene_bounds(glb):
+    """World-space (min, max) over every mesh instance in the default scene, in bind pose."""
+    gltf = glb.json
+    nodes = gltf.get("nodes", [])
+    world = world_matrices(gltf)
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for index, matrix in world.items():
+        node = nodes[index]
+        if "mesh" not in node:
+            continue
+        for primitive in gltf["meshes"][node["mesh"]]["primitives"]:
+            accessor_index = primitive["attributes"].get("POSITION")
+            if accessor_index is None:
+                continue
+            # Skinned vertices follow their joints; the node transform is ignored
+            if "skin" in node and "JOINTS_0" in primitive["attributes"]:
+                points = _skinned_positions(glb, primitive, gltf["skins"][node["skin"]], world)
+            else:
+                accessor = gltf["accessors"][accessor_index]
+                if "min" in accessor and "max" in accessor:
+                    pmin, pmax = np.array(accessor["min"]), np.array(accessor["max"])
+                else:
+                    positions = glb.read_accessor(accessor_index)
+                    pmin, pmax = positions.min(axis=0), positions.max(axis=0)
+                corners = np.array([[x, y, z, 1.0] for x in (pmin[0], pmax[0]) for y in (pmin[1], pmax[1]) for z in (pmin[2], pmax[2])])
+                points = (matrix @ corners.T).T[:, :3]
+            if len(points):
+                lo = np.minimum(lo, points.min(axis=0))
+                hi = np.maximum(hi, points.max(axis=0))
+    return lo, hi
+
+
+def _channels_for(gltf, node_index, path):
+    for animation in gltf.get("animations", []):
+        for channel in animation["channels"]:
+            target = channel["target"]
+            if target.get("node") == node_index and target["path"] == path:
+                yield animation["samplers"][channel["sampler"]]
+
+
+# ── Transforms ───────────────────────────────────────────────
+
+
+def recenter(glb, ground=True):
+    """
+    Move the model so its bounds are centered on the origin.
+
+    With ground=True the lowest point sits at y=0 instead of being centered
+    vertically, which is what the game expects when it stacks models.
+    Animated root translations are shifted by the same offset.
+    """
+    lo, hi = scene_bounds(glb)
+    if not np.all(np.isfinite(lo)):
+        return
+    center = (lo + hi) / 2
+    offset = -center
+    if ground:
+        offset[1] = -lo[1]
+    if np.allclose(offset, 0):
+        return
+
+    gltf = glb.json
+    nodes = gltf["nodes"]
+    for root in scene_roots(gltf):
+        node = nodes[root]
+        if "matrix" in node:
+            matrix = node["matrix"]
+            for axis in range(3):
+                matrix[12 + axis] += float(offset[axis])
+        else:
+            node["translation"] = (np.array(node.get("translation", [0, 0, 0])) + offset).tolist()
+
+        for sampler in _channels_for(gltf, root, "translation"):
+            values = glb.read_accessor(sampler["output"]).astype(np.float32)
+            if sampler.get("interpolation") == "CUBICSPLINE":
+                values[1::3] += offset.astype(np.float32)
+            else:
+                values += offset.astype(np.float32)
+            glb.write_accessor(sampler["output"], values)
+
+
+def root_joints(gltf):
+    """Topmost joint of every skin (usually the hips on Mixamo rigs)."""
+    parents = parent_map(gltf)
+    roots = set()
+    for skin in gltf.get("skins", []):
+        joints = set(skin["joints"])
+        roots.update(j for j in joints if parents.get(j) not in joints)
+    return roots
+
+
+def strip_root_motion(glb, axes=(0, 2), nodes=None):
+    """
+    Pin root translation on the given axes to its first keyframe.
+
+    Defaults to the horizontal plane (glTF x and z) of each skin's root
+    joint, so walk cycles play in place while keeping their vertical bob.
+    """
+    gltf = glb.json
+    targets = root_joints(gltf) if nodes is None else set(nodes)
+    axes = list(axes)
+    for node_index in targets:
+        for sampler in _channels_for(gltf, node_index, "translation"):
+            values = glb.read_accessor(sampler["output"]).astype(np.float32)
+            if sampler.get("interpolation") == "CUBICSPLINE":
+                keys = values[1::3]
+                keys[:, axes] = keys[0, axes]
+                values[1::3] = keys
+                values[0::3, axes] = 0
+                values[2::3, axes] = 0
+            else:
+                values[:, axes] = values[0, axes]
+            glb.write_accessor(sampler["output"], values)
+
+
+def _set_path(target, dotted, value):
+    keys = dotted.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    if value is None:
+        target.pop(keys[-1], None)
+    else:
+        target[keys[-1]] = value
+
+
+def patch_materials(glb, patches):
+    """
+    Apply parameter patches to materials.
+
+    patches maps a material name (or "*" for every material) to a dict of
+    dotted glTF paths and values, e.g.
+    {"*": {"pbrMetallicRoughness.roughnessFactor": 0.8}}. A value of None
+    removes the key.
+    """
+    for material in glb.json.get("materials", []):
+        for name in ("*", material.get("name")):
+            for path, value in patches.get(name, {}).items():
+                _set_path(material, path, value)
+
+
+def _extras_owners(gltf):
+    yield gltf
+    yield gltf.get("asset", {})
+    for key in ("scenes", "nodes", "meshes", "materials", "skins", "animations", "textures", "images", "cameras"):
+        yield from gltf.get(key, [])
+    for mesh in gltf.get("meshes", []):
+        yield from mesh.get("primitives", [])
+
+
+def strip_extras(glb, keep=()):
+    """Remove extras everywhere, e.g. Blender custom properties, except keys in keep."""
+    for owner in _extras_owners(glb.json):
+        extras = owner.get("extras")
+        if not isinstance(extras, dict):
+            owner.pop("extras", None)
+            continue
+        kept = {k: v for k, v in extras.items() if k in keep}
+        if kept:
+            owner["extras"] = kept
+        else:
+            owner.pop("extras", None)
+
+
+def set_extras(glb, extras, target="asset"):
+    """
+    Merge extras into the asset ("asset"), the glTF root ("root") or the
+    default scene ("scene"). Keys set to None are removed.
+    """
+    gltf = glb.json
+    if target == "asset":
+        owner = gltf.setdefault("asset", {"version": "2.0"})
+    elif target == "root":
+        owner = gltf
+    elif target == "scene":
+        owner = gltf["scenes"][gltf.get("scene", 0)]
+    else:
+        raise ValueError(f"Unknown extras target: {target}")
+
+    merged = dict(owner.get("extras", {}))
+    for key, value in extras.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    if merged:
+        owner["extras"] = merged
+    else:
+        owner.pop("extras", None)
+
+
+def used_accessors(gltf):
+    used = set()
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            used.update(primitive.get("attributes", {}).values())
+            if "indices" in primitive:
+                used.add(primitive["indices"])
+            for target in primitive.get("targets", []):
+                used.update(target.values())
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            used.add(skin["inverseBindMatrices"])
+    for animation in gltf.get("animations", []):
+        for sampler in animation["samplers"]:
+            used.add(sampler["input"])
+            used.add(sampler["output"])
+    for node in gltf.get("nodes", []):
+        instancing = node.get("extensions", {}).get("EXT_mesh_gpu_instancing")
+        if instancing:
+            used.update(instancing["attributes"].values())
+    return used
+
+
+def prune_accessors(glb):
+    """Remove accessors nothing references; returns how many were dropped."""
+    gltf = glb.json
+    accessors = gltf.get("accessors", [])
+    used = sorted(used_accessors(gltf))
+    if len(used) == len(accessors):
+        return 0
+    remap = {old: new for new, old in enumerate(used)}
+
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            primitive["attributes"] = {k: remap[v] for k, v in primitive.get("attributes", {}).items()}
+            if "indices" in primitive:
+                primitive["indices"] = remap[primitive["indices"]]
+            if "targets" in primitive:
+                primitive["targets"] = [{k: remap[v] for k, v in t.items()} for t in primitive["targets"]]
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = remap[skin["inverseBindMatrices"]]
+    for animation in gltf.get("animations", []):
+        for sampler in animation["samplers"]:
+            sampler["input"] = remap[sampler["input"]]
+            sampler["output"] = remap[sampler["output"]]
+    for node in gltf.get("nodes", []):
+        instancing = node.get("extensions", {}).get("EXT_mesh_gpu_instancing")
+        if instancing:
+            instancing["attributes"] = {k: remap[v] for k, v in instancing["attributes"].items()}
+
+    gltf["accessors"] = [accessors[i] for i in used]
+    return len(accessors) - len(used)
+
+
+# ── Running chains ───────────────────────────────────────────
+
+
+def run(glb, transforms):
+    for transform in transforms:
+        transform(glb)
+    return glb
+
+
+def transform_file(src, transforms, dst=None):
+    """
+    Load src, apply transforms, compact and write to dst (src by default).
+
+    Returns a dict with the input/output sizes and elapsed milliseconds.
+    """
+    start = time.perf_counter()
+    with open(src, "rb") as f:
+        data = f.read()
+    glb = run(Glb.loads(data), transforms)
+    size = glb.save(dst or src)
+    return {
+        "path": str(dst or src),
+        "bytes_in": len(data),
+        "bytes_out": size,
+        "ms": (time.perf_counter() - start) * 1000,
+    }
@@ -0,0 +1,126 @@
+"""
+Ambient occlusion baking for vertex-colored models.
+
+Bakes Cycles AO into a color attribute so the exported GLBs carry their own
+contact shadows. The result is either multiplied into the existing 'Col'
+layer or kept as a separate '_AO' attribute (the glTF exporter writes
+underscore-prefixed attributes as custom vertex attributes).
+
+Imported by convert_fbx_to_glb.py and export_farmer_models.py.
+"""
+
+from contextlib import contextmanager
+
+import bpy
+import numpy as np
+
+AO_ATTRIBUTE = "_AO"
+AO_MODES = ("multiply", "attribute")
+
+
+def _ensure_world(scene):
+    """Cycles reads the AO distance from the world, which empty scenes lack."""
+    if scene.world is None:
+        scene.world = bpy.data.worlds.new("AOBakeWorld")
+    return scene.world
+
+
+@contextmanager
+def _rest_pose(mesh_objects):
+    """
+    Show the armatures deforming mesh_objects in their rest pose, so the bake
+    sees the bind pose rather than whatever frame the active action is on.
+    """
+    armatures = {mod.object.data for obj in mesh_objects for mod in obj.modifiers
+                 if mod.type == 'ARMATURE' and mod.object and mod.object.type == 'ARMATURE'}
+    previous = {armature: armature.pose_position for armature in armatures}
+    for armature in armatures:
+        armature.pose_position = 'REST'
+    bpy.context.view_layer.update()
+    try:
+        yield
+    finally:
+        for armature, position in previous.items():
+            armature.pose_position = position
+        bpy.context.view_layer.update()
+
+
+def _read_colors(attr):
+    colors = np.empty(len(attr.data) * 4, dtype=np.float32)
+    attr.data.foreach_get("color", colors)
+    return colors.reshape(-1, 4)
+
+
+def bake_vertex_ao(mesh_objects, mode="multiply", color_layer="Col", samples=64, distance=0.5):
+    """
+    Bake ambient occlusion into the vertex colors of mesh_objects.
+
+    mode="multiply" darkens color_layer in place; mode="attribute" leaves
+    color_layer untouched and stores occlusion in AO_ATTRIBUTE. A color_layer
+    of None uses each mesh's active color attribute. Meshes without the
+    layer are skipped. Armature-deformed meshes are baked in their rest pose.
+    Returns the number of baked meshes.
+    """
+    if mode not in AO_MODES:
+        raise ValueError(f"Unknown AO bake mode: {mode}")
+
+    # object -> name of the color layer the occlusion applies to
+    layers = {}
+    for obj in mesh_objects:
+        if obj.type != 'MESH':
+            continue
+        attrs = obj.data.color_attributes
+        name = color_layer or (attrs.active_color.name if attrs.active_color else None)
+        if name and name in attrs and name != AO_ATTRIBUTE:
+            layers[obj] = name
+
+    targets = list(layers)
+    if not targets:
+        print(f"  AO bake: no meshes with a '{color_layer or 'active'}' color layer")
+        return 0
+
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.samples = samples
+    _ensure_world(scene).light_settings.distance = distance
+
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Bake writes into each object's active color attribute
+    for obj in targets:
+        mesh = obj.data
+        source = mesh.color_attributes[layers[obj]]
+        existing = mesh.color_attributes.get(AO_ATTRIBUTE)
+        if existing:
+            mesh.color_attributes.remove(existing)
+        ao = mesh.color_attributes.new(AO_ATTRIBUTE, 'FLOAT_COLOR', source.domain)
+        mesh.color_attributes.active_color = ao
+
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in targets:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = targets[0]
+
+    print(f"  AO bake: {len(targets)} meshes, {samples} samples, distance {distance}")
+    with _rest_pose(targets):
+        bpy.ops.object.bake(type='AO', target='VERTEX_COLORS')
+
+    for obj in targets:
+        mesh = obj.data
+        source = mesh.color_attributes[layers[obj]]
+        ao = mesh.color_attributes[AO_ATTRIBUTE]
+
+        if mode == "multiply":
+            colors = _read_colors(source)
+            occlusion = _read_colors(ao)
+            colors[:, :3] *= occlusion[:, :1]
+            source.data.foreach_set("color", colors.ravel())
+            mesh.color_attributes.remove(ao)
+
+        # Keep the original layer as the one the exporter writes as COLOR_0
+        mesh.color_attributes.active_color = mesh.color_attributes[layers[obj]]
+        mesh.color_attributes.render_color_index = mesh.color_attributes.active_color_index
+        mesh.update()
+
+    return len(targets)
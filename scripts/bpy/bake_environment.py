@@ -0,0 +1,126 @@
+"""
+Bake the diorama environment for Homestead Headaches.
+
+  - environment.exr -> environment.env: GGX-prefiltered specular cubemap with
+    one roughness level per mip, plus spherical-harmonic irradiance, in
+    Babylon's .env format (load with CubeTexture.CreateFromPrefilteredData).
+  - sky.jpg, environment_dome.jpg -> mip-mapped UASTC .ktx2
+  - grass_color.jpg + grass_roughness.jpg -> grass_color_roughness.ktx2
+    (sRGB color in RGB, linear roughness in A); grass_normal.jpg ->
+    grass_normal.ktx2 (two-channel normal map)
+
+Blender is only used to decode the EXR and JPEGs; filtering and encoding
+happen in scripts/asset_pipeline. The texture step needs toktx on PATH.
+
+Run: blender --background --python scripts/bpy/bake_environment.py -- [--env-size 256]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import bpy
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+ENV_DIR = os.path.join(PROJECT_ROOT, "public", "assets", "environment")
+sys.path.insert(0, SCRIPT_DIR)
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from asset_pipeline.envmap import build_env
+from asset_pipeline.ktx import encode_ktx2, find_toktx
+from asset_pipeline.manifest import write_manifest
+from asset_pipeline.png import write_png
+from cli_args import blender_args
+
+# output name -> (sources, sRGB color data)
+TEXTURES = {
+    "sky": (["sky.jpg"], True),
+    "environment_dome": (["environment_dome.jpg"], True),
+    "grass_color_roughness": (["grass_color.jpg", "grass_roughness.jpg"], True),
+    "grass_normal": (["grass_normal.jpg"], False),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bake environment and diorama textures")
+    parser.add_argument("--env-size", type=int, default=256, help="Cube face size of the .env (power of two)")
+    parser.add_argument("--skip-env", action="store_true")
+    parser.add_argument("--skip-textures", action="store_true")
+    return parser.parse_args(blender_args())
+
+
+def load_pixels(path):
+    """Pixels as float32 (height, width, 4), rows top to bottom, no color conversion."""
+    image = bpy.data.images.load(path)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)[::-1]
+
+
+def resize_nearest(pixels, height, width):
+    if pixels.shape[:2] == (height, width):
+        return pixels
+    rows = (np.arange(height) * pixels.shape[0] // height)
+    cols = (np.arange(width) * pixels.shape[1] // width)
+    return pixels[rows][:, cols]
+
+
+def to_bytes(pixels):
+    return np.round(np.clip(pixels, 0, 1) * 255).astype(np.uint8)
+
+
+def bake_env(size):
+    src = os.path.join(ENV_DIR, "environment.exr")
+    dst = os.path.join(ENV_DIR, "environment.env")
+    print(f"Prefiltering {os.path.basename(src)} at {size}px...")
+    start = time.perf_counter()
+    data, info = build_env(load_pixels(src), size)
+    with open(dst, "wb") as f:
+        f.write(data)
+    print(f"  {len(info['specular']['mipmaps']) // 6} mips, {len(data)} bytes "
+          f"in {time.perf_counter() - start:.1f}s -> {dst}")
+
+
+def bake_textures():
+    if not find_toktx():
+        print("WARNING: toktx not found on PATH, skipping KTX2 textures (install KTX-Software)")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (sources, srgb) in TEXTURES.items():
+            paths = [os.path.join(ENV_DIR, s) for s in sources]
+            missing = [p for p in paths if not os.path.exists(p)]
+            if missing:
+                print(f"  WARNING: {name}: missing {missing}")
+                continue
+
+            pixels = load_pixels(paths[0])
+            if name == "grass_color_roughness":
+                roughness = resize_nearest(load_pixels(paths[1]), *pixels.shape[:2])
+                pixels = np.concatenate([pixels[..., :3], roughness[..., :1]], axis=-1)
+            else:
+                pixels = pixels[..., :3]
+
+            png = os.path.join(tmp, f"{name}.png")
+            write_png(png, to_bytes(pixels))
+            dst = os.path.join(ENV_DIR, f"{name}.ktx2")
+            encode_ktx2(png, dst, srgb=srgb, normal_map=name == "grass_normal")
+            print(f"  {name}.ktx2: {os.path.getsize(dst)} bytes (from {', '.join(sources)})")
+
+
+def main():
+    args = parse_args()
+    if not args.skip_env:
+        bake_env(args.env_size)
+    if not args.skip_textures:
+        bake_textures()
+    write_manifest(os.path.join(PROJECT_ROOT, "public"))
+
+
+main()
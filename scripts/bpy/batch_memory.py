@@ -0,0 +1,160 @@
+"""
+Bounded-memory batch runs for Blender scripts that loop over many models.
+
+Blender never gives memory back reliably: images, node groups, cameras,
+lights and actions left from earlier iterations pile up even when nothing
+uses them. For each finished model this module:
+
+  - purges every orphan data block, recursively,
+  - records the resident set size, peak RSS and data-block counts,
+  - saves progress to a small JSON state file, and
+  - once RSS passes --memory-limit-mb, re-executes the same Blender command
+    line with --resume so the fresh process skips the models already done.
+
+The state file is deleted when a batch completes. An interrupted run can be
+continued by hand with --resume.
+
+Imported by render-animal-portraits.py, render-farmer-portraits.py and
+convert_fbx_to_glb.py.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import bpy
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+STATE_DIR = os.path.join(PROJECT_ROOT, ".cache", "batch")
+
+COUNTED_BLOCKS = (
+    "objects", "meshes", "materials", "textures", "images", "node_groups",
+    "cameras", "lights", "armatures", "actions", "collections", "libraries",
+)
+
+# Models finished by this process (a fresh exec always gets at least one done)
+_processed_here = 0
+
+
+def add_batch_arguments(parser, script_name):
+    parser.add_argument("--memory-limit-mb", type=int, default=0,
+                        help="Restart Blender and resume once RSS exceeds this (0: never)")
+    parser.add_argument("--batch-state", default=os.path.join(STATE_DIR, f"{script_name}.json"),
+                        help="Progress file used to resume after a restart")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip models recorded as done in --batch-state")
+
+
+# ── Measurements ─────────────────────────────────────────────
+
+
+def rss_mb():
+    """Current resident set size in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except OSError:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(os.getpid())], capture_output=True, text=True).stdout
+        return int(out.strip() or 0) / 1024
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def datablock_counts():
+    return {name: len(getattr(bpy.data, name)) for name in COUNTED_BLOCKS if hasattr(bpy.data, name)}
+
+
+def purge_orphans():
+    """Remove every data block with no users, recursively. Returns how many went."""
+    if hasattr(bpy.data, "orphans_purge"):  # Blender 3.2+
+        return bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+    removed = 0
+    while True:
+        orphans = [(collection, block)
+                   for collection in (getattr(bpy.data, name) for name in dir(bpy.data))
+                   if isinstance(collection, bpy.types.bpy_prop_collection)
+                   for block in collection
+                   if isinstance(block, bpy.types.ID) and block.users == 0 and not block.use_fake_user]
+        if not orphans:
+            return removed
+        for collection, block in orphans:
+            if hasattr(collection, "remove"):
+                collection.remove(block)
+                removed += 1
+
+
+# ── Progress state ───────────────────────────────────────────
+
+
+def load_state(path, resume):
+    """Progress from an earlier process when resuming, otherwise a fresh state."""
+    if resume and os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        print(f"Resuming batch: {len(state['done'])} done ({', '.join(state['done'])})")
+        return state
+    return {"done": {}, "memory": {}}
+
+
+def _save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def record(state, path, name, result):
+    """Purge orphans, log memory for a finished model and save progress."""
+    global _processed_here
+    _processed_here += 1
+    purged = purge_orphans()
+    stats = {"rss_mb": round(rss_mb(), 1), "peak_rss_mb": round(peak_rss_mb(), 1),
+             "purged": purged, "blocks": datablock_counts()}
+    state["done"][name] = result
+    state["memory"][name] = stats
+    _save_state(path, state)
+
+    leftovers = ", ".join(f"{k} {v}" for k, v in stats["blocks"].items() if v)
+    print(f"  Memory after {name}: RSS {stats['rss_mb']:.0f} MB (peak {stats['peak_rss_mb']:.0f} MB), "
+          f"purged {purged} blocks; left: {leftovers or 'nothing'}")
+
+
+def recycle_if_needed(path, limit_mb, remaining):
+    """Re-exec Blender with --resume when RSS is over limit_mb and work remains."""
+    if not limit_mb or not remaining or not _processed_here:
+        return
+    current = rss_mb()
+    if current <= limit_mb:
+        return
+
+    argv = sys.argv[1:]
+    if "--" not in argv:
+        argv.append("--")
+    if "--resume" not in argv[argv.index("--"):]:
+        argv.append("--resume")
+    if "--batch-state" not in argv[argv.index("--"):]:
+        argv += ["--batch-state", path]
+
+    print(f"\nRSS {current:.0f} MB over the {limit_mb} MB limit; restarting Blender for {remaining} remaining")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(bpy.app.binary_path, [bpy.app.binary_path] + argv)
+
+
+def finish(state, path):
+    """Print per-model memory and drop the state file. Returns the done results."""
+    if state["memory"]:
+        print("\nMemory per model:")
+        for name, stats in state["memory"].items():
+            print(f"  {name}: RSS {stats['rss_mb']:.0f} MB, peak {stats['peak_rss_mb']:.0f} MB")
+    if os.path.exists(path):
+        os.remove(path)
+    return state["done"]
@@ -0,0 +1,17 @@
+"""
+Command-line options for Blender scripts.
+
+Blender keeps its own arguments in sys.argv; a script's options follow "--":
+
+    blender --background --python scripts/bpy/bake_environment.py -- --env-size 256
+
+No bpy import, so any script can parse its options before touching Blender.
+"""
+
+import sys
+
+
+def blender_args(argv=None):
+    """Script options: whatever follows "--" on the Blender command line."""
+    argv = sys.argv if argv is None else argv
+    return argv[argv.index("--") + 1:] if "--" in argv else []
@@ -1,9 +1,23 @@
+import argparse
 import bpy
+import glob
 import os
 import sys
 
 # Paths (relative to this script, not CWD)
 _script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _script_dir)
+sys.path.insert(0, os.path.dirname(_script_dir))
+
+from ao_bake import AO_MODES, bake_vertex_ao
+from asset_pipeline.manifest import write_manifest
+from asset_pipeline.materials import report_signatures
+from asset_pipeline.meshopt import optimize_file
+from batch_memory import add_batch_arguments, finish, load_state, purge_orphans, record, recycle_if_needed
+from cli_args import blender_args
+from vat_bake import VAT_FORMATS, armature_actions, glb_skin_bind, sample_bone_matrices, write_bone_texture
+from vertex_color_material import canonicalize_vertex_colors
+
 _project_root = os.path.abspath(os.path.join(_script_dir, "..", ".."))
 source_dir = os.path.join(_project_root, "FarmAnimals_v1.1")
 target_dir = os.path.join(_project_root, "public", "assets", "models")
@@ -11,6 +25,21 @@ target_dir = os.path.join(_project_root, "public", "assets", "models")
 if not os.path.exists(target_dir):
     os.makedirs(target_dir)
 
+# Options are passed after "--": blender --background --python convert_fbx_to_glb.py -- --bake-ao multiply
+parser = argparse.ArgumentParser(description="Convert farm animal FBX files to GLB")
+parser.add_argument("--bake-ao", choices=AO_MODES, default=None,
+                    help="Bake Cycles AO into the vertex colors ('multiply') or a separate '_AO' attribute ('attribute')")
+parser.add_argument("--ao-samples", type=int, default=64)
+parser.add_argument("--ao-distance", type=float, default=0.5)
+parser.add_argument("--skip-mesh-opt", action="store_true",
+                    help="Keep the exporter's vertex/index order (no weld, cache, overdraw or fetch optimization)")
+parser.add_argument("--vat", action="store_true",
+                    help="Also bake every action into a bone-matrix texture (<name>.vat.bin + <name>.vat.json)")
+parser.add_argument("--vat-fps", type=int, default=30)
+parser.add_argument("--vat-format", choices=sorted(VAT_FORMATS), default="half")
+add_batch_arguments(parser, "convert_fbx_to_glb")
+args = parser.parse_args(blender_args())
+
 # Mapping specific files to generic game names
 name_map = {
     "ChickenBrown.fbx": "chicken",
@@ -37,60 +66,27 @@ def reset_scene():
         bpy.data.textures.remove(block)
     for block in bpy.data.images:
         bpy.data.images.remove(block)
+    # Armatures, actions, node groups etc. left by the previous import
+    purge_orphans()
 
-def setup_vertex_colors_material():
-    """
-    Ensures that if a mesh has vertex colors, they are connected to a material
-    so the GLTF exporter includes them.
-    """
-    for obj in bpy.context.selected_objects:
-        if obj.type == 'MESH':
-            mesh = obj.data
-            if mesh.vertex_colors:
-                # Get or create material
-                mat = None
-                if len(mesh.materials) > 0:
-                    mat = mesh.materials[0]
-                else:
-                    mat = bpy.data.materials.new(name="VertexColorMat")
-                    mesh.materials.append(mat)
-                
-                mat.use_nodes = True
-                nodes = mat.node_tree.nodes
-                links = mat.node_tree.links
-                
-                # Clear existing nodes except Material Output
-                for n in list(nodes):
-                    if n.type != 'OUTPUT_MATERIAL':
-                        nodes.remove(n)
-
-                # Reuse existing Output node or create one
-                node_output = next((n for n in nodes if n.type == 'OUTPUT_MATERIAL'), None)
-                if not node_output:
-                    node_output = nodes.new(type='ShaderNodeOutputMaterial')
-                node_output.location = (400, 0)
-                node_principled = nodes.new(type='ShaderNodeBsdfPrincipled')
-                node_principled.location = (0, 0)
-                
-                # Create Attribute Node for Vertex Color
-                node_attribute = nodes.new(type='ShaderNodeVertexColor') # Or ShaderNodeAttribute
-                node_attribute.location = (-200, 0)
-                # Usually the default vertex color layer is named "Col" or similar.
-                # ShaderNodeVertexColor uses active layer by default if name is empty
-                # But let's check layer name
-                if mesh.vertex_colors.active:
-                    vc_layer_name = mesh.vertex_colors.active.name
-                    node_attribute.layer_name = vc_layer_name
-                
-                # Link Color -> Base Color
-                links.new(node_attribute.outputs['Color'], node_principled.inputs['Base Color'])
-                links.new(node_principled.outputs['BSDF'], node_output.inputs['Surface'])
-                
-                print(f"Setup material for {obj.name} with vertex color layer")
+def find_skinned_pair():
+    """Return (armature, mesh) for the imported rig, or (None, None)."""
+    for obj in bpy.context.scene.objects:
+        if obj.type != 'MESH':
+            continue
+        for mod in obj.modifiers:
+            if mod.type == 'ARMATURE' and mod.object:
+                return mod.object, obj
+    return None, None
 
 print("Starting conversion...")
 
-for filename, target_name in name_map.items():
+# Skip animals finished before a memory restart
+state = load_state(args.batch_state, args.resume)
+pending = [filename for filename in name_map if name_map[filename] not in state["done"]]
+
+for i, filename in enumerate(pending):
+    target_name = name_map[filename]
     filepath = os.path.join(source_dir, filename)
     
     if not os.path.exists(filepath):
@@ -108,9 +104,23 @@ for filename, target_name in name_map.items():
     if bpy.context.object and bpy.context.object.mode != 'OBJECT':
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    # Select all imported objects to process materials
+    # Every animal shares one vertex-color material so Babylon compiles a single shader
     bpy.ops.object.select_all(action='SELECT')
-    setup_vertex_colors_material()
+    canonicalize_vertex_colors([obj for obj in bpy.context.selected_objects if obj.type == 'MESH'])
+
+    if args.bake_ao:
+        meshes = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+        bake_vertex_ao(meshes, mode=args.bake_ao, color_layer=None, samples=args.ao_samples, distance=args.ao_distance)
+
+    # Sampling restores the active action and frame, so the export below is unaffected
+    vat = None
+    if args.vat:
+        armature, _ = find_skinned_pair()
+        actions = armature_actions(armature) if armature else []
+        if actions:
+            vat = sample_bone_matrices(armature, actions, args.vat_fps)
+        else:
+            print(f"  VAT: no armature actions in {filename}, skipping")
 
     # Export GLB
     out_path = os.path.join(target_dir, f"{target_name}.glb")
@@ -119,9 +129,24 @@ for filename, target_name in name_map.items():
         filepath=out_path,
         export_format='GLB',
         export_apply=True, # Apply modifiers
-        export_animations=True
+        export_animations=True,
+        export_attributes=args.bake_ao == "attribute"
     )
     
     print(f"Exported {out_path}")
 
+    if not args.skip_mesh_opt:
+        optimize_file(out_path)
+
+    if vat:
+        bone_names, frames, clips = vat
+        write_bone_texture(os.path.join(target_dir, target_name), bone_names, frames, clips,
+                           args.vat_fps, args.vat_format, skin_bind=glb_skin_bind(out_path))
+
+    record(state, args.batch_state, target_name, True)
+    recycle_if_needed(args.batch_state, args.memory_limit_mb, len(pending) - i - 1)
+
+finish(state, args.batch_state)
 print("Conversion complete.")
+report_signatures(sorted(glob.glob(os.path.join(target_dir, "**", "*.glb"), recursive=True)))
+write_manifest(os.path.join(_project_root, "public"))
@@ -1,11 +1,27 @@
 """
 Export Farmer Models for Homestead Headaches
 
-Method: Import FBX, Setup Materials to use Vertex Colors ('Col') via Attribute Node, Export GLB.
+Method: Import FBX, assign the shared vertex-color material (reads 'Col'), Export GLB.
 """
 
+import argparse
 import bpy
+import glob
 import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
+sys.path.insert(0, SCRIPT_DIR)
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from ao_bake import AO_MODES, bake_vertex_ao
+from asset_pipeline.manifest import write_manifest
+from asset_pipeline.materials import report_signatures
+from asset_pipeline.meshopt import optimize_file
+from asset_pipeline.split import DEFAULT_BASE_CLIPS, split_animations
+from cli_args import blender_args
+from vertex_color_material import canonicalize_vertex_colors
 
 # --- CONFIGURATION ---
 ASSETS_ROOT = "/Users/jbogaty/assets/Farmers_Family"
@@ -30,32 +46,22 @@ CHARACTERS = {
     }
 }
 
-def setup_material_vertex_color(mat, mesh_obj):
-    print(f"  Setting up VColor material: {mat.name}")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-    nodes.clear()
-    
-    # Principled BSDF
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.location = (0,0)
-    bsdf.inputs['Metallic'].default_value = 0.0
-    bsdf.inputs['Roughness'].default_value = 0.8
-    
-    # Output
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    output.location = (300,0)
-    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    # Attribute Node
-    attr_node = nodes.new(type='ShaderNodeAttribute')
-    attr_node.location = (-300, 0)
-    attr_node.attribute_name = "Col" 
-    
-    links.new(attr_node.outputs['Color'], bsdf.inputs['Base Color'])
+def parse_args():
+    """Options are passed after "--" on the Blender command line."""
+    parser = argparse.ArgumentParser(description="Export farmer GLBs")
+    parser.add_argument("--bake-ao", choices=AO_MODES, default=None,
+                        help="Bake Cycles AO into 'Col' ('multiply') or a separate '_AO' attribute ('attribute')")
+    parser.add_argument("--ao-samples", type=int, default=64)
+    parser.add_argument("--ao-distance", type=float, default=0.3)
+    parser.add_argument("--skip-mesh-opt", action="store_true",
+                        help="Keep the exporter's vertex/index order (no weld, cache, overdraw or fetch optimization)")
+    parser.add_argument("--split-animations", action="store_true",
+                        help="Keep only the base clips in <name>.glb and write every other clip to <name>.<clip>.glb")
+    parser.add_argument("--base-clips", nargs="+", default=list(DEFAULT_BASE_CLIPS),
+                        help="Clips kept in the base GLB with --split-animations (default: idle)")
+    return parser.parse_args(blender_args())
 
-def process_character(char_key, config):
+def process_character(char_key, config, args):
     print(f"\nProcessing {char_key}...")
     
     bpy.ops.wm.read_factory_settings(use_empty=True)
@@ -77,13 +83,15 @@ def process_character(char_key, config):
     bpy.context.view_layer.objects.active = armature
     bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
 
-    if not mesh_obj.data.vertex_colors or "Col" not in mesh_obj.data.vertex_colors:
-        if mesh_obj.data.vertex_colors:
-            mesh_obj.data.vertex_colors[0].name = "Col"
-
+    # Same shared vertex-color material as the animals (one shader for every model)
     print("  Processing Materials...")
-    for mat in mesh_obj.data.materials:
-        setup_material_vertex_color(mat, mesh_obj)
+    canonicalize_vertex_colors([mesh_obj])
+
+    # Bake in rest pose, before any animation is attached
+    if args.bake_ao:
+        print("  Baking AO...")
+        bake_vertex_ao([mesh_obj], mode=args.bake_ao, color_layer="Col",
+                       samples=args.ao_samples, distance=args.ao_distance)
 
     print("  Importing Animations...")
     if not armature.animation_data:
@@ -124,10 +132,20 @@ def process_character(char_key, config):
         export_animations=True,
         export_nla_strips=True,
         export_def_bones=True,
+        export_attributes=args.bake_ao == "attribute",
     )
+    if not args.skip_mesh_opt:
+        optimize_file(output_path)
+    if args.split_animations:
+        split_animations(output_path, base_clips=args.base_clips)
     print("  Done.")
 
+args = parse_args()
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 for key, conf in CHARACTERS.items():
-    process_character(key, conf)
\ No newline at end of file
+    process_character(key, conf, args)
+
+report_signatures(sorted(glob.glob(os.path.join(PROJECT_ROOT, "public", "assets", "models", "**", "*.glb"), recursive=True)))
+
+write_manifest(os.path.join(PROJECT_ROOT, "public"))
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Cache glTF imports as .blend libraries.
+
+bpy.ops.import_scene.gltf rebuilds armatures, skinning and materials from
+scratch on every call. import_glb_cached() stores the imported objects (and
+everything they use) in a .blend keyed by the GLB's content hash and the
+Blender version; later runs append from that library instead of re-importing.
+
+Imported by render-animal-portraits.py and render-farmer-portraits.py.
+"""
+
+import json
+import os
+import time
+
+import bpy
+
+from asset_pipeline.manifest import file_hash
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CACHE_DIR = os.path.join(PROJECT_ROOT, ".cache", "glb-import")
+
+# One entry per import: {"path", "cached", "ms", "import_ms"}
+STATS = []
+
+
+def _cache_key(filepath):
+    major, minor = bpy.app.version[:2]
+    return f"{file_hash(filepath)[:32]}-b{major}.{minor}"
+
+
+def _select(objects):
+    bpy.ops.object.select_all(action="DESELECT")
+    for obj in objects:
+        obj.select_set(True)
+    if objects:
+        armatures = [o for o in objects if o.type == "ARMATURE"]
+        bpy.context.view_layer.objects.active = (armatures or objects)[0]
+
+
+def import_glb_cached(filepath, cache_dir=CACHE_DIR, enabled=True):
+    """
+    Import a GLB and return the new objects, left selected like the glTF
+    operator leaves them. With enabled=False this is a plain import.
+    """
+    start = time.perf_counter()
+    key = _cache_key(filepath) if enabled else None
+    library = os.path.join(cache_dir, f"{key}.blend") if key else None
+    meta_path = os.path.join(cache_dir, f"{key}.json") if key else None
+
+    if library and os.path.exists(library):
+        with bpy.data.libraries.load(library, link=False) as (data_from, data_to):
+            data_to.objects = list(data_from.objects)
+        objects = [obj for obj in data_to.objects if obj is not None]
+        for obj in objects:
+            obj.use_fake_user = False  # only needed inside the library; let clear_scene free them
+            bpy.context.scene.collection.objects.link(obj)
+        _select(objects)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        import_ms = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                import_ms = json.load(f).get("import_ms")
+        STATS.append({"path": filepath, "cached": True, "ms": elapsed, "import_ms": import_ms})
+        speedup = f" (glTF import was {import_ms:.0f} ms)" if import_ms else ""
+        print(f"  Import cache hit: {elapsed:.0f} ms{speedup}")
+        return objects
+
+    before = set(bpy.data.objects)
+    bpy.ops.import_scene.gltf(filepath=filepath)
+    objects = [obj for obj in bpy.data.objects if obj not in before]
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if library:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = library + ".tmp"
+        bpy.data.libraries.write(tmp, set(objects), fake_user=True)
+        os.replace(tmp, library)
+        with open(meta_path, "w") as f:
+            json.dump({"source": os.path.relpath(filepath, PROJECT_ROOT), "import_ms": elapsed}, f)
+
+    _select(objects)
+    STATS.append({"path": filepath, "cached": False, "ms": elapsed, "import_ms": elapsed})
+    print(f"  glTF import: {elapsed:.0f} ms" + (" (cached)" if library else ""))
+    return objects
+
+
+def report():
+    """Print import times with and without the cache."""
+    if not STATS:
+        return
+    cold = [s["ms"] for s in STATS if not s["cached"]]
+    warm = [s for s in STATS if s["cached"]]
+    print("\nImport times:")
+    if cold:
+        print(f"  glTF import: {len(cold)} files, avg {sum(cold) / len(cold):.0f} ms")
+    if warm:
+        avg = sum(s["ms"] for s in warm) / len(warm)
+        known = [s["import_ms"] for s in warm if s["import_ms"]]
+        line = f"  cache hits:  {len(warm)} files, avg {avg:.0f} ms"
+        if known:
+            line += f" (vs {sum(known) / len(known):.0f} ms uncached)"
+        print(line)
@@ -0,0 +1,97 @@
+"""
+Restrict Cycles to the part of the frame the model covers.
+
+Portrait and sprite frames are mostly empty transparent pixels. These helpers
+project a world-space bounding box through the scene camera and set
+render.border_* to that rectangle plus a pixel margin. use_crop_to_border
+stays off, so Blender writes the full-size image with everything outside the
+border left transparent: the same canvas, with only the border traced.
+
+The margin covers the pixel filter (1.5 px by default) and the denoiser's
+neighbourhood so edge pixels come out the same as in a full-frame render.
+
+Imported by render-animal-portraits.py and render-farmer-portraits.py.
+"""
+
+import itertools
+
+import bpy
+import mathutils
+from bpy_extras.object_utils import world_to_camera_view
+
+DEFAULT_MARGIN_PX = 8
+
+
+def world_bounds(objects):
+    """World-space (min, max) of the evaluated (posed, deformed) objects."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    min_co = [float("inf")] * 3
+    max_co = [float("-inf")] * 3
+    for obj in objects:
+        eval_obj = obj.evaluated_get(depsgraph)
+        for corner in eval_obj.bound_box:
+            world_co = eval_obj.matrix_world @ mathutils.Vector(corner)
+            for i in range(3):
+                min_co[i] = min(min_co[i], world_co[i])
+                max_co[i] = max(max_co[i], world_co[i])
+    return min_co, max_co
+
+
+def projected_border(scene, camera, min_co, max_co, margin_px=DEFAULT_MARGIN_PX):
+    """
+    Normalized (min_x, max_x, min_y, max_y) of the box min_co..max_co as seen
+    by camera, grown by margin_px and clamped to the frame.
+    """
+    bpy.context.view_layer.update()  # camera/model matrix_world after moves
+    xs, ys = [], []
+    for corner in itertools.product(*zip(min_co, max_co)):
+        co = world_to_camera_view(scene, camera, mathutils.Vector(corner))
+        xs.append(co.x)
+        ys.append(co.y)
+
+    scale = scene.render.resolution_percentage / 100
+    margin_x = margin_px / (scene.render.resolution_x * scale)
+    margin_y = margin_px / (scene.render.resolution_y * scale)
+    return (
+        max(0.0, min(xs) - margin_x),
+        min(1.0, max(xs) + margin_x),
+        max(0.0, min(ys) - margin_y),
+        min(1.0, max(ys) + margin_y),
+    )
+
+
+def set_render_border(scene, border):
+    """
+    Render only border (normalized min_x, max_x, min_y, max_y) into the full
+    canvas. Returns the fraction of frame pixels that will be traced.
+    """
+    min_x, max_x, min_y, max_y = border
+    render = scene.render
+    if min_x >= max_x or min_y >= max_y or (min_x, max_x, min_y, max_y) == (0.0, 1.0, 0.0, 1.0):
+        render.use_border = False
+        return 1.0
+    render.border_min_x, render.border_max_x = min_x, max_x
+    render.border_min_y, render.border_max_y = min_y, max_y
+    render.use_border = True
+    render.use_crop_to_border = False
+    return (max_x - min_x) * (max_y - min_y)
+
+
+def frame_border(scene, camera, min_co, max_co, margin_px=DEFAULT_MARGIN_PX):
+    """Project, apply and report the render border for one model."""
+    fraction = set_render_border(scene, projected_border(scene, camera, min_co, max_co, margin_px))
+    scale = scene.render.resolution_percentage / 100
+    width = round(scene.render.resolution_x * scale)
+    height = round(scene.render.resolution_y * scale)
+    if scene.render.use_border:
+        r = scene.render
+        print(f"  Render border: {round((r.border_max_x - r.border_min_x) * width)}x"
+              f"{round((r.border_max_y - r.border_min_y) * height)} of {width}x{height} "
+              f"({fraction:.0%} of pixels)")
+    else:
+        print(f"  Render border: full frame {width}x{height}")
+    return fraction
+
+
+def clear_border(scene):
+    scene.render.use_border = False
@@ -0,0 +1,207 @@
+"""
+Pre-rendered sprite strips: a 2D fallback for devices that can't skin GLBs.
+
+Steps an armature through its animation clips at a fixed frame rate, renders
+each frame with whatever camera and lights are in the scene, and packs the
+frames of each clip into one PNG sheet (left to right, then top to bottom).
+Every sheet gets a JSON sidecar describing its grid and timing:
+
+    {"clip": "walk", "image": "farmer_john_walk.png", "frameWidth": 128,
+     "frameHeight": 128, "columns": 12, "rows": 1, "frameCount": 12,
+     "fps": 12, "duration": 1.0, "loop": true, "pivot": [0.5, 0.94],
+     "worldHeight": 2.07}
+
+pivot is the ground point under the model in frame UVs (origin top-left) and
+worldHeight is the frame height in world units, so a billboard can be
+placed and sized to match the 3D model it stands in for. The camera is
+framed once on the union of the model's bounds over every frame of every
+clip, so the model doesn't jitter or change scale between frames or clips.
+
+Imported by render-animal-portraits.py and render-farmer-portraits.py.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+
+import bpy
+import numpy as np
+
+from asset_pipeline.png import write_png
+from render_border import frame_border, world_bounds
+from vat_bake import armature_actions, assign_action
+
+DEFAULT_FPS = 12
+DEFAULT_FRAME_SIZE = 128
+MAX_SHEET_WIDTH = 2048
+FRAMING_PADDING = 1.08
+
+
+def _clip_label(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.split("|")[-1].lower()).strip("_")
+
+
+def find_clips(armature, names=None):
+    """
+    [(label, action)] for the armature's actions. With names, only those
+    clips, in that order; the glTF importer's "_<object>" suffix is ignored.
+    """
+    actions = armature_actions(armature)
+    if names is None:
+        return [(_clip_label(action.name), action) for action in actions]
+
+    clips = []
+    for name in names:
+        wanted = name.lower()
+        match = next((a for a in actions if _clip_label(a.name) == wanted
+                      or _clip_label(a.name).startswith(wanted + "_")), None)
+        if match:
+            clips.append((name, match))
+        else:
+            print(f"  WARNING: clip '{name}' not found on {armature.name} (split out with --split-animations?)")
+    return clips
+
+
+def clip_frames(action, fps):
+    """Scene frames to sample for one loop of action at fps (last == first is dropped)."""
+    scene = bpy.context.scene
+    scene_fps = scene.render.fps / scene.render.fps_base
+    start, end = action.frame_range
+    duration = (end - start) / scene_fps
+    count = max(1, int(round(duration * fps)))
+    return [start + i * scene_fps / fps for i in range(count)], duration
+
+
+def _set_frame(frame):
+    bpy.context.scene.frame_set(int(frame), subframe=frame - int(frame))
+
+
+def _play(armature, action):
+    """Make action the only thing driving armature (the glTF importer leaves every clip on an NLA track)."""
+    if armature.animation_data:
+        for track in armature.animation_data.nla_tracks:
+            track.mute = True
+    assign_action(armature, action)
+
+
+def union_bounds(objects, armature, clips, fps):
+    """World bounds of objects over every sampled frame of every clip."""
+    min_co = [float("inf")] * 3
+    max_co = [float("-inf")] * 3
+    for _, action in clips:
+        _play(armature, action)
+        for frame in clip_frames(action, fps)[0]:
+            _set_frame(frame)
+            lo, hi = world_bounds(objects)
+            for i in range(3):
+                min_co[i] = min(min_co[i], lo[i])
+                max_co[i] = max(max_co[i], hi[i])
+    return min_co, max_co
+
+
+def frame_camera(camera, min_co, max_co, padding=FRAMING_PADDING):
+    """Centre the front-facing ortho camera on the bounds and fit them in a square frame."""
+    camera.location.x = (min_co[0] + max_co[0]) / 2
+    camera.location.z = (min_co[2] + max_co[2]) / 2
+    camera.data.ortho_scale = max(max_co[0] - min_co[0], max_co[2] - min_co[2]) * padding
+    return camera.data.ortho_scale
+
+
+def _read_png(path):
+    image = bpy.data.images.load(path)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    # Blender stores rows bottom to top; 8-bit PNGs load unconverted
+    return np.round(pixels.reshape(height, width, 4)[::-1] * 255).astype(np.uint8)
+
+
+def render_strips(name, objects, armature, camera, out_dir, clip_names=None,
+                  fps=DEFAULT_FPS, frame_size=DEFAULT_FRAME_SIZE, border_margin=None):
+    """
+    Render one sheet + JSON per clip as <out_dir>/<name>_<clip>.png/.json.
+    Scene render settings and the camera are restored afterwards. Returns the
+    metadata dicts written.
+    """
+    if not armature:
+        print(f"  WARNING: {name} has no armature, no sprite strips")
+        return []
+    clips = find_clips(armature, clip_names)
+    if not clips:
+        return []
+
+    scene = bpy.context.scene
+    render = scene.render
+    saved = {
+        "resolution": (render.resolution_x, render.resolution_y, render.resolution_percentage),
+        "filepath": render.filepath,
+        "border": render.use_border,
+        "frame": scene.frame_current,
+        "camera": (camera.location.copy(), camera.data.ortho_scale),
+        "action": armature.animation_data.action if armature.animation_data else None,
+        "mute": [t.mute for t in armature.animation_data.nla_tracks] if armature.animation_data else [],
+    }
+
+    render.resolution_x = render.resolution_y = frame_size
+    render.resolution_percentage = 100
+    min_co, max_co = union_bounds(objects, armature, clips, fps)
+    world_height = frame_camera(camera, min_co, max_co)
+    if border_margin is not None:
+        frame_border(scene, camera, min_co, max_co, border_margin)
+    pivot_v = (camera.location.z + world_height / 2 - min_co[2]) / world_height
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix="sprite_strips_")
+    written = []
+    try:
+        for label, action in clips:
+            frames, duration = clip_frames(action, fps)
+            columns = min(len(frames), max(1, MAX_SHEET_WIDTH // frame_size))
+            rows = math.ceil(len(frames) / columns)
+            sheet = np.zeros((rows * frame_size, columns * frame_size, 4), dtype=np.uint8)
+
+            _play(armature, action)
+            for i, frame in enumerate(frames):
+                _set_frame(frame)
+                render.filepath = os.path.join(tmp_dir, f"{i:04d}.png")
+                bpy.ops.render.render(write_still=True)
+                row, col = divmod(i, columns)
+                sheet[row * frame_size:(row + 1) * frame_size,
+                      col * frame_size:(col + 1) * frame_size] = _read_png(render.filepath)
+
+            image_name = f"{name}_{label}.png"
+            size = write_png(os.path.join(out_dir, image_name), sheet)
+            meta = {
+                "clip": label,
+                "image": image_name,
+                "frameWidth": frame_size,
+                "frameHeight": frame_size,
+                "columns": columns,
+                "rows": rows,
+                "frameCount": len(frames),
+                "fps": fps,
+                "duration": round(duration, 4),
+                "loop": True,
+                "pivot": [0.5, round(pivot_v, 4)],
+                "worldHeight": round(world_height, 4),
+            }
+            with open(os.path.join(out_dir, f"{name}_{label}.json"), "w") as f:
+                json.dump(meta, f, indent=2)
+            written.append(meta)
+            print(f"  Strip {image_name}: {len(frames)} frames, {columns}x{rows} grid, {size} bytes")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        render.resolution_x, render.resolution_y, render.resolution_percentage = saved["resolution"]
+        render.filepath = saved["filepath"]
+        render.use_border = saved["border"]
+        camera.location, camera.data.ortho_scale = saved["camera"]
+        if armature.animation_data:
+            armature.animation_data.action = saved["action"]
+            for track, mute in zip(armature.animation_data.nla_tracks, saved["mute"]):
+                track.mute = mute
+        scene.frame_set(saved["frame"])
+    return written
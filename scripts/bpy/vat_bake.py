@@ -0,0 +1,192 @@
+"""
+Bone-matrix animation textures for GPU-instanced crowds.
+
+Samples every action on an armature at a fixed frame rate and stores the
+per-frame skinning matrices in a float texture: one row per frame, four RGBA
+texels per bone (a column-major 4x4 matrix), plus a trailing identity bone.
+This is the layout Babylon's BakedVertexAnimationManager reads, so many
+animals of one species can share a single texture and animate in the shader.
+
+Matrices are the GLB's own skinning matrices, joint world x
+inverseBindMatrix, with the joints posed by the sampled frame. They map a
+vertex as stored in the GLB to its posed position in glTF scene space (Y-up).
+glTF ignores a skinned mesh node's own transform, so Babylon places skinned
+meshes at the scene root and scene space is the mesh's local space: the
+shader then applies only each instance's world matrix, never an object
+transform a second time. The .vat.json records this as "space": "mesh".
+Bone columns follow the joint order of the GLB's first skin.
+
+Imported by convert_fbx_to_glb.py.
+"""
+
+import json
+import os
+import sys
+
+import bpy
+import mathutils
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from asset_pipeline.glb import Glb
+from asset_pipeline.transforms import world_matrices
+
+VAT_FORMATS = {"half": np.float16, "float": np.float32}
+
+# Blender Z-up to glTF Y-up: (x, y, z) -> (x, z, -y)
+_TO_GLTF = mathutils.Matrix((
+    (1, 0, 0, 0),
+    (0, 0, 1, 0),
+    (0, -1, 0, 0),
+    (0, 0, 0, 1),
+))
+
+
+def _action_fcurves(action):
+    layers = getattr(action, "layers", None)
+    if layers:  # Slotted actions (Blender 4.4+)
+        for layer in layers:
+            for strip in layer.strips:
+                for bag in strip.channelbags:
+                    yield from bag.fcurves
+    else:
+        yield from getattr(action, "fcurves", ())
+
+
+def armature_actions(armature):
+    """Actions that animate bones of this armature."""
+    bone_names = {bone.name for bone in armature.data.bones}
+    actions = []
+    for action in bpy.data.actions:
+        for fcurve in _action_fcurves(action):
+            if fcurve.data_path.startswith('pose.bones["') and fcurve.data_path.split('"')[1] in bone_names:
+                actions.append(action)
+                break
+    return actions
+
+
+def assign_action(armature, action):
+    if not armature.animation_data:
+        armature.animation_data_create()
+    armature.animation_data.action = action
+    slots = getattr(action, "slots", None)
+    if slots and not armature.animation_data.action_slot:
+        armature.animation_data.action_slot = slots[0]
+
+
+def sample_bone_matrices(armature, actions, fps):
+    """
+    Sample each action and return (bone_names, frames, clips).
+
+    frames is an array shaped (total_frames, bones, 4, 4) holding each bone's
+    deformation from rest to the sampled pose, in glTF scene space. clips
+    lists {"name", "from", "to"} row ranges into it. write_bone_texture()
+    turns these into skinning matrices with the exported GLB's bind data.
+    """
+    scene = bpy.context.scene
+    scene_fps = scene.render.fps / scene.render.fps_base
+    bones = list(armature.pose.bones)
+    bone_names = [pb.name for pb in bones]
+
+    to_gltf = _TO_GLTF
+    from_gltf = _TO_GLTF.inverted()
+    arm_world = armature.matrix_world.copy()
+    arm_world_inv = arm_world.inverted()
+    rest_inv = [pb.bone.matrix_local.inverted() for pb in bones]
+
+    saved_action = armature.animation_data.action if armature.animation_data else None
+    saved_frame = scene.frame_current
+
+    rows = []
+    clips = []
+    for action in actions:
+        assign_action(armature, action)
+        start, end = action.frame_range
+        count = max(1, int(round((end - start) / scene_fps * fps)) + 1)
+        first_row = len(rows)
+        for i in range(count):
+            frame = start + i * scene_fps / fps
+            scene.frame_set(int(frame), subframe=frame - int(frame))
+            frame_mats = []
+            for pb, inv in zip(bones, rest_inv):
+                deform = to_gltf @ arm_world @ pb.matrix @ inv @ arm_world_inv @ from_gltf
+                frame_mats.append(np.array(deform, dtype=np.float64))
+            rows.append(frame_mats)
+        clips.append({"name": action.name, "from": first_row, "to": len(rows) - 1})
+        print(f"    VAT clip {action.name}: {count} frames")
+
+    if armature.animation_data:
+        armature.animation_data.action = saved_action
+    scene.frame_set(saved_frame)
+
+    return bone_names, np.array(rows, dtype=np.float64).reshape(len(rows), len(bones), 4, 4), clips
+
+
+def glb_skin_bind(glb_path):
+    """
+    (joint names, bind matrices) of the GLB's first skin, or None.
+
+    A bind matrix is the joint's rest world matrix x its inverseBindMatrix:
+    it takes a vertex as stored in the GLB to its rest position in scene
+    space. It is the identity when the exporter wrote vertices in scene space
+    and carries the armature/mesh object transforms otherwise.
+    """
+    glb = Glb.load(glb_path)
+    skins = glb.json.get("skins", [])
+    if not skins:
+        return None
+    skin = skins[0]
+    nodes = glb.json["nodes"]
+    world = world_matrices(glb.json)
+    joint_worlds = np.array([world.get(j, np.identity(4)) for j in skin["joints"]])
+    if "inverseBindMatrices" in skin:
+        ibm = glb.read_accessor(skin["inverseBindMatrices"]).reshape(-1, 4, 4).transpose(0, 2, 1)
+        joint_worlds = joint_worlds @ ibm
+    return [nodes[j].get("name") for j in skin["joints"]], joint_worlds
+
+
+def write_bone_texture(out_base, bone_names, frames, clips, fps, fmt="half", skin_bind=None):
+    """
+    Write <out_base>.vat.bin (raw little-endian RGBA texels) and
+    <out_base>.vat.json (layout and clip table). Returns the JSON dict.
+
+    skin_bind is glb_skin_bind() of the exported GLB: bones are reordered to
+    its joints and each deformation is multiplied by the joint's bind
+    matrix. Without it the GLB is assumed to hold vertices in scene space.
+    Returns None, writing nothing, if the GLB's joints don't match the bones.
+    """
+    if skin_bind:
+        joint_order, binds = skin_bind
+        missing = [name for name in joint_order if name not in bone_names]
+        if missing:
+            print(f"    WARNING: GLB joints missing from armature, skipping VAT: {missing[:3]}")
+            return None
+        index = [bone_names.index(name) for name in joint_order]
+        frames = frames[:, index] @ binds
+        bone_names = list(joint_order)
+
+    frame_count, bone_count = frames.shape[:2]
+    # Column-major per bone, plus the identity bone Babylon appends
+    columns = frames.transpose(0, 1, 3, 2).reshape(frame_count, bone_count, 16)
+    identity = np.tile(np.identity(4, dtype=np.float32).ravel(), (frame_count, 1, 1))
+    texels = np.concatenate([columns, identity], axis=1).astype(VAT_FORMATS[fmt])
+
+    width = (bone_count + 1) * 4
+    with open(out_base + ".vat.bin", "wb") as f:
+        f.write(texels.astype(texels.dtype.newbyteorder("<")).tobytes())
+
+    table = {
+        "format": "RGBA16F" if fmt == "half" else "RGBA32F",
+        "space": "mesh",
+        "width": width,
+        "height": frame_count,
+        "boneCount": bone_count,
+        "bones": bone_names,
+        "fps": fps,
+        "clips": [dict(clip, fps=fps) for clip in clips],
+    }
+    with open(out_base + ".vat.json", "w") as f:
+        json.dump(table, f, indent=2)
+    print(f"  VAT texture {width}x{frame_count} ({fmt}) -> {os.path.basename(out_base)}.vat.bin")
+    return table
@@ -0,0 +1,72 @@
+"""
+One canonical vertex-color material for every exported model.
+
+Every animal and farmer uses the same material: a Color Attribute node
+reading "Col" into a Principled BSDF with metallic 0 and roughness 0.8.
+Because every GLB carries an identical material and a COLOR_0 attribute,
+Babylon compiles a single shader for all of them (see
+asset_pipeline/materials.py for the cross-GLB signature report).
+
+Imported by convert_fbx_to_glb.py and export_farmer_models.py.
+"""
+
+import bpy
+
+MATERIAL_NAME = "VertexColor"
+COLOR_ATTRIBUTE = "Col"
+METALLIC = 0.0
+ROUGHNESS = 0.8
+
+
+def canonical_material():
+    """Get or (re)build the shared material so its node tree is always identical."""
+    mat = bpy.data.materials.get(MATERIAL_NAME) or bpy.data.materials.new(MATERIAL_NAME)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    nodes.clear()
+
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+    output.location = (300, 0)
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    bsdf.location = (0, 0)
+    bsdf.inputs['Metallic'].default_value = METALLIC
+    bsdf.inputs['Roughness'].default_value = ROUGHNESS
+    color = nodes.new(type='ShaderNodeVertexColor')
+    color.location = (-300, 0)
+    color.layer_name = COLOR_ATTRIBUTE
+
+    links.new(color.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+    return mat
+
+
+def canonicalize_vertex_colors(mesh_objects):
+    """
+    Rename each mesh's active color attribute to "Col" and replace all of its
+    material slots with the canonical material. Meshes without color
+    attributes are left alone. Returns the number of meshes changed.
+    """
+    mat = None
+    changed = 0
+    for obj in mesh_objects:
+        mesh = obj.data
+        attributes = mesh.color_attributes
+        if not len(attributes):
+            continue
+
+        if COLOR_ATTRIBUTE not in attributes:
+            source = attributes.active_color or attributes[0]
+            source.name = COLOR_ATTRIBUTE
+        col = attributes[COLOR_ATTRIBUTE]
+        attributes.active_color = col
+        attributes.render_color_index = attributes.find(COLOR_ATTRIBUTE)
+
+        mat = mat or canonical_material()
+        old = [m.name for m in mesh.materials if m]
+        mesh.materials.clear()
+        mesh.materials.append(mat)
+        mesh.polygons.foreach_set("material_index", [0] * len(mesh.polygons))
+        changed += 1
+        print(f"  {obj.name}: {', '.join(old) or 'no material'} -> {MATERIAL_NAME} ({COLOR_ATTRIBUTE})")
+    return changed
@@ -6,20 +6,34 @@ Renders front-facing portraits of 3D animal models to PNG with transparent backg
 Uses Blender's Python API (bpy) to load GLB models and render them.
 
 Run with: blender --background --python scripts/render-animal-portraits.py
+Disable the .blend import cache with: ... -- --no-import-cache
 
 Requirements:
 - Blender 3.0+ installed and available in PATH
 """
 
+import argparse
 import bpy
 import mathutils
 import os
 import sys
 import math
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bpy"))
+
+from asset_pipeline.manifest import write_manifest
+from batch_memory import add_batch_arguments, finish, load_state, purge_orphans, record, recycle_if_needed
+from cli_args import blender_args
+from import_cache import CACHE_DIR, import_glb_cached, report as report_imports
+from render_border import DEFAULT_MARGIN_PX, clear_border, frame_border, world_bounds
+from sprite_strips import DEFAULT_FPS, DEFAULT_FRAME_SIZE, render_strips
+
 # Configuration
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public")
 MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public", "assets", "models")
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public", "assets", "sprites")
+STRIPS_DIR = os.path.join(OUTPUT_DIR, "strips")
 
 # Animals to render (model filename without extension -> output filename)
 ANIMALS = {
@@ -35,18 +49,34 @@ RENDER_SIZE = 512  # Square output
 SAMPLES = 64  # Cycles samples for quality
 
 
+def parse_args():
+    """Options are passed after "--" on the Blender command line."""
+    parser = argparse.ArgumentParser(description="Render animal portraits")
+    add_batch_arguments(parser, "render-animal-portraits")
+    parser.add_argument("--no-import-cache", action="store_true",
+                        help="Always run the glTF importer instead of appending from the .blend cache")
+    parser.add_argument("--import-cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-render-border", action="store_true",
+                        help="Trace the whole frame instead of only the model's projected bounds")
+    parser.add_argument("--border-margin", type=int, default=DEFAULT_MARGIN_PX,
+                        help="Pixels added around the projected bounds (default %(default)s)")
+    parser.add_argument("--sprite-strips", action="store_true",
+                        help="Also render animated sprite sheets + JSON per clip into sprites/strips/")
+    parser.add_argument("--clips", nargs="+", default=None,
+                        help="Clips to render (default: every action on the armature)")
+    parser.add_argument("--strip-fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--strip-size", type=int, default=DEFAULT_FRAME_SIZE,
+                        help="Square frame size in pixels (default %(default)s)")
+    return parser.parse_args(blender_args())
+
+
 def clear_scene():
     """Remove all objects from the scene"""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
 
-    # Clear orphan data
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for block in bpy.data.materials:
-        if block.users == 0:
-            bpy.data.materials.remove(block)
+    # Clear orphan data (textures, node groups, cameras and lights included)
+    purge_orphans()
 
 
 def setup_render_settings():
@@ -132,10 +162,10 @@ def setup_lighting():
     rim_obj.rotation_euler = (math.radians(120), 0, math.radians(180))
 
 
-def load_glb(filepath):
+def load_glb(filepath, args):
     """Load a GLB file and return the imported objects"""
-    # Import GLB
-    bpy.ops.import_scene.gltf(filepath=filepath)
+    # Import GLB (or append it from the .blend import cache)
+    import_glb_cached(filepath, cache_dir=args.import_cache_dir, enabled=not args.no_import_cache)
 
     # Get all mesh objects that were imported
     imported = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
@@ -178,7 +208,7 @@ def center_and_scale_model(objects):
         obj.scale *= scale_factor
 
 
-def render_portrait(model_name, output_filename):
+def render_portrait(model_name, output_filename, args):
     """Render a single animal portrait"""
     print(f"\n{'='*50}")
     print(f"Rendering: {model_name}")
@@ -189,7 +219,7 @@ def render_portrait(model_name, output_filename):
 
     # Setup
     setup_lighting()
-    setup_camera()
+    camera = setup_camera()
 
     # Load model
     model_path = os.path.join(MODELS_DIR, f"{model_name}.glb")
@@ -197,7 +227,7 @@ def render_portrait(model_name, output_filename):
         print(f"ERROR: Model not found: {model_path}")
         return False
 
-    objects = load_glb(model_path)
+    objects = load_glb(model_path, args)
     if not objects:
         print(f"ERROR: No mesh objects imported from {model_path}")
         return False
@@ -207,6 +237,14 @@ def render_portrait(model_name, output_filename):
     # Center and scale
     center_and_scale_model(objects)
 
+    # Only trace the pixels the model covers
+    scene = bpy.context.scene
+    if args.no_render_border:
+        clear_border(scene)
+    else:
+        min_co, max_co = world_bounds(objects)
+        frame_border(scene, camera, min_co, max_co, args.border_margin)
+
     # Set output path
     output_path = os.path.join(OUTPUT_DIR, output_filename)
     bpy.context.scene.render.filepath = output_path
@@ -216,10 +254,16 @@ def render_portrait(model_name, output_filename):
     bpy.ops.render.render(write_still=True)
 
     print(f"SUCCESS: {output_filename}")
+
+    if args.sprite_strips:
+        render_strips(model_name, objects, objects[0].find_armature(), camera, STRIPS_DIR,
+                      args.clips, args.strip_fps, args.strip_size,
+                      None if args.no_render_border else args.border_margin)
     return True
 
 
 def main():
+    args = parse_args()
     print("\n" + "="*60)
     print("Homestead Headaches - Animal Portrait Renderer")
     print("="*60)
@@ -231,11 +275,15 @@ def main():
     # Setup render settings
     setup_render_settings()
 
-    # Render each animal
-    results = []
-    for model_name, output_filename in ANIMALS.items():
-        success = render_portrait(model_name, output_filename)
-        results.append((model_name, success))
+    # Render each animal, skipping any finished before a memory restart
+    state = load_state(args.batch_state, args.resume)
+    pending = [name for name in ANIMALS if name not in state["done"]]
+    for i, model_name in enumerate(pending):
+        success = render_portrait(model_name, ANIMALS[model_name], args)
+        record(state, args.batch_state, model_name, success)
+        recycle_if_needed(args.batch_state, args.memory_limit_mb, len(pending) - i - 1)
+    done = finish(state, args.batch_state)
+    results = [(name, done[name]) for name in ANIMALS if name in done]
 
     # Summary
     print("\n" + "="*60)
@@ -248,6 +296,9 @@ def main():
     successful = sum(1 for _, s in results if s)
     print(f"\nCompleted: {successful}/{len(results)} portraits")
     print(f"Output: {OUTPUT_DIR}")
+    report_imports()
+
+    write_manifest(PUBLIC_DIR)
 
 
 if __name__ == "__main__":
@@ -13,14 +13,17 @@ The farmer models are Mixamo-rigged GLBs with armatures. This script:
 
 Run:
   blender --background --python scripts/render-farmer-portraits.py
+  blender --background --python scripts/render-farmer-portraits.py -- --no-import-cache
 
 Requirements:
   - Blender 3.6+ with glTF importer
 """
 
+import argparse
 import bpy
 import mathutils
 import os
+import sys
 import math
 
 # ── Paths ────────────────────────────────────────────────────
@@ -28,6 +31,17 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 MODELS_DIR = os.path.join(PROJECT_ROOT, "public", "assets", "models", "farmers")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "public", "assets", "sprites")
+STRIPS_DIR = os.path.join(OUTPUT_DIR, "strips")
+
+sys.path.insert(0, SCRIPT_DIR)
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "bpy"))
+
+from asset_pipeline.manifest import write_manifest
+from batch_memory import add_batch_arguments, finish, load_state, purge_orphans, record, recycle_if_needed
+from cli_args import blender_args
+from import_cache import CACHE_DIR, import_glb_cached, report as report_imports
+from render_border import DEFAULT_MARGIN_PX, clear_border, frame_border
+from sprite_strips import DEFAULT_FPS, DEFAULT_FRAME_SIZE, render_strips
 
 # ── Farmer definitions ───────────────────────────────────────
 FARMERS = [
@@ -52,18 +66,33 @@ SAMPLES = 128         # Cycles samples
 CAMERA_ORTHO_SCALE = 1.1  # Tight upper-body portrait crop
 
 
+def parse_args():
+    """Options are passed after "--" on the Blender command line."""
+    parser = argparse.ArgumentParser(description="Render farmer portraits")
+    add_batch_arguments(parser, "render-farmer-portraits")
+    parser.add_argument("--no-import-cache", action="store_true",
+                        help="Always run the glTF importer instead of appending from the .blend cache")
+    parser.add_argument("--import-cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-render-border", action="store_true",
+                        help="Trace the whole frame instead of only the model's projected bounds")
+    parser.add_argument("--border-margin", type=int, default=DEFAULT_MARGIN_PX,
+                        help="Pixels added around the projected bounds (default %(default)s)")
+    parser.add_argument("--sprite-strips", action="store_true",
+                        help="Also render animated sprite sheets + JSON per clip into sprites/strips/")
+    parser.add_argument("--clips", nargs="+", default=["idle", "walk"],
+                        help="Clips to render (default: idle walk)")
+    parser.add_argument("--strip-fps", type=int, default=DEFAULT_FPS)
+    parser.add_argument("--strip-size", type=int, default=DEFAULT_FRAME_SIZE,
+                        help="Square frame size in pixels (default %(default)s)")
+    return parser.parse_args(blender_args())
+
+
 def clear_scene():
     """Remove every object and orphan data block."""
     bpy.ops.object.select_all(action="SELECT")
     bpy.ops.object.delete(use_global=False)
 
-    for collection_name in ["meshes", "materials", "armatures", "actions", "images"]:
-        collection = getattr(bpy.data, collection_name, None)
-        if collection is None:
-            continue
-        for block in list(collection):
-            if block.users == 0:
-                collection.remove(block)
+    purge_orphans()
 
 
 def setup_render():
@@ -147,13 +176,14 @@ def setup_lighting():
     rim_obj.rotation_euler = (math.radians(120), 0, math.radians(180))
 
 
-def load_farmer_glb(filepath):
+def load_farmer_glb(filepath, args):
     """
     Import a farmer GLB and return (armature, mesh_objects).
 
     Farmer GLBs contain a Mixamo-rigged armature + one or more mesh children.
+    Repeat runs append the imported scene from the .blend import cache.
     """
-    bpy.ops.import_scene.gltf(filepath=filepath)
+    import_glb_cached(filepath, cache_dir=args.import_cache_dir, enabled=not args.no_import_cache)
 
     armature = None
     meshes = []
@@ -243,7 +273,7 @@ def pose_idle(armature):
     bpy.context.view_layer.update()
 
 
-def render_farmer(farmer_config):
+def render_farmer(farmer_config, args):
     """Load, pose, frame, and render one farmer portrait."""
     label = farmer_config["label"]
     glb_path = farmer_config["glb"]
@@ -262,7 +292,7 @@ def render_farmer(farmer_config):
     setup_lighting()
 
     # Load model
-    armature, meshes = load_farmer_glb(glb_path)
+    armature, meshes = load_farmer_glb(glb_path, args)
     if not meshes:
         print(f"  ERROR: No mesh objects imported from {glb_path}")
         return False
@@ -285,7 +315,7 @@ def render_farmer(farmer_config):
 
     # Portrait framing: focus on upper body (chest/face area)
     portrait_center_z = min_co[2] + height * 0.75
-    setup_camera(center_y=0, center_z=portrait_center_z)
+    camera = setup_camera(center_y=0, center_z=portrait_center_z)
 
     # Center model on X axis under camera
     if armature:
@@ -294,6 +324,15 @@ def render_farmer(farmer_config):
         for m in meshes:
             m.location.x -= center_x
 
+    # Only trace the pixels the model covers (bounds shifted with the model)
+    scene = bpy.context.scene
+    if args.no_render_border:
+        clear_border(scene)
+    else:
+        min_co[0] -= center_x
+        max_co[0] -= center_x
+        frame_border(scene, camera, min_co, max_co, args.border_margin)
+
     # Render
     output_path = os.path.join(OUTPUT_DIR, output_name)
     bpy.context.scene.render.filepath = output_path
@@ -301,10 +340,16 @@ def render_farmer(farmer_config):
     print(f"  Rendering to: {output_path}")
     bpy.ops.render.render(write_still=True)
     print(f"  Done: {output_name}")
+
+    if args.sprite_strips:
+        render_strips(f"farmer_{farmer_config['id']}", meshes, armature, camera, STRIPS_DIR,
+                      args.clips, args.strip_fps, args.strip_size,
+                      None if args.no_render_border else args.border_margin)
     return True
 
 
 def main():
+    args = parse_args()
     print("\n" + "=" * 60)
     print("Homestead Headaches - Farmer Portrait Renderer")
     print("=" * 60)
@@ -312,10 +357,15 @@ def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     setup_render()
 
-    results = []
-    for farmer in FARMERS:
-        ok = render_farmer(farmer)
-        results.append((farmer["label"], ok))
+    # Skip farmers finished before a memory restart
+    state = load_state(args.batch_state, args.resume)
+    pending = [farmer for farmer in FARMERS if farmer["id"] not in state["done"]]
+    for i, farmer in enumerate(pending):
+        ok = render_farmer(farmer, args)
+        record(state, args.batch_state, farmer["id"], ok)
+        recycle_if_needed(args.batch_state, args.memory_limit_mb, len(pending) - i - 1)
+    done = finish(state, args.batch_state)
+    results = [(farmer["label"], done[farmer["id"]]) for farmer in FARMERS if farmer["id"] in done]
 
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -326,6 +376,9 @@ def main():
     ok_count = sum(1 for _, ok in results if ok)
     print(f"\n  {ok_count}/{len(results)} portraits rendered")
     print(f"  Output: {OUTPUT_DIR}")
+    report_imports()
+
+    write_manifest(os.path.join(PROJECT_ROOT, "public"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+Shared fixtures for the asset_pipeline tests.
+
+The pipeline is pure Python + NumPy, so these run without Blender:
+
+    python -m pytest tests/asset_pipeline
+
+GLBs are built in memory: a small skinned grid with two joints, a root
+translation clip, two materials and an unreferenced accessor, which is
+enough to exercise every transform.
+"""
+
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from asset_pipeline.glb import TARGET_ARRAY_BUFFER, TARGET_ELEMENT_ARRAY_BUFFER, Glb  # noqa: E402
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def grid(n=6, offset=(3.0, 1.0, 0.0)):
+    """An n x n vertex grid in the xy plane: (positions, indices)."""
+    xs, ys = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 2, n))
+    positions = np.stack([xs.ravel(), ys.ravel(), np.zeros(n * n)], 1) + offset
+    triangles = []
+    for row in range(n - 1):
+        for col in range(n - 1):
+            a = row * n + col
+            triangles += [a, a + 1, a + n, a + 1, a + n + 1, a + n]
+    return positions.astype(np.float32), np.array(triangles, dtype=np.uint16)
+
+
+def build_glb(n=6, morph=False, sparse_morph=False):
+    """
+    Skinned grid whose bind pose equals its vertex positions (the inverse
+    bind matrices undo the joint transforms). morph adds one morph target,
+    stored as a sparse accessor with sparse_morph.
+    """
+    positions, indices = grid(n)
+    count = len(positions)
+    glb = Glb({
+        "asset": {"version": "2.0", "generator": "test", "extras": {"exporter": "blender"}},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [
+            {"name": "Armature", "children": [1, 3]},
+            {"name": "Hips", "translation": [0, 1, 0], "children": [2]},
+            {"name": "Spine", "translation": [0, 1, 0]},
+            {"name": "Body", "mesh": 0, "skin": 0, "extras": {"prop": 1}},
+        ],
+        "meshes": [{"name": "Body", "primitives": [{"attributes": {}, "material": 0}]}],
+        "materials": [
+            {"name": "MatA", "pbrMetallicRoughness": {"metallicFactor": 0, "roughnessFactor": 0.5}},
+            {"name": "MatB", "pbrMetallicRoughness": {"metallicFactor": 0, "roughnessFactor": 0.5}},
+        ],
+        "skins": [{"joints": [1, 2]}],
+        "animations": [],
+    })
+
+    primitive = glb.json["meshes"][0]["primitives"][0]
+    attributes = primitive["attributes"]
+    attributes["POSITION"] = glb.add_accessor(positions, target=TARGET_ARRAY_BUFFER)
+    glb.json["accessors"][attributes["POSITION"]].update(
+        min=positions.min(0).tolist(), max=positions.max(0).tolist())
+    attributes["NORMAL"] = glb.add_accessor(np.tile(np.float32([0, 0, 1]), (count, 1)), target=TARGET_ARRAY_BUFFER)
+    attributes["COLOR_0"] = glb.add_accessor(np.tile(np.float32([1, 0.5, 0.2, 1]), (count, 1)),
+                                             target=TARGET_ARRAY_BUFFER)
+    joints = np.zeros((count, 4), dtype=np.uint8)
+    joints[:, 0] = positions[:, 1] > 2
+    weights = np.zeros((count, 4), dtype=np.float32)
+    weights[:, 0] = 1
+    attributes["JOINTS_0"] = glb.add_accessor(joints, target=TARGET_ARRAY_BUFFER)
+    attributes["WEIGHTS_0"] = glb.add_accessor(weights, target=TARGET_ARRAY_BUFFER)
+    primitive["indices"] = glb.add_accessor(indices, "SCALAR", TARGET_ELEMENT_ARRAY_BUFFER)
+
+    if morph:
+        moved = np.arange(0, count, 3, dtype=np.uint16)
+        deltas = np.zeros((count, 3), dtype=np.float32)
+        deltas[moved, 2] = 0.25
+        if sparse_morph:
+            glb.json["accessors"].append({
+                "componentType": 5126, "count": count, "type": "VEC3",
+                "sparse": {
+                    "count": len(moved),
+                    "indices": {"bufferView": glb.add_view(moved.tobytes()), "componentType": 5123},
+                    "values": {"bufferView": glb.add_view(deltas[moved].tobytes())},
+                },
+            })
+            target = len(glb.json["accessors"]) - 1
+        else:
+            target = glb.add_accessor(deltas, target=TARGET_ARRAY_BUFFER)
+        primitive["targets"] = [{"POSITION": target}]
+
+    ibm = np.tile(np.identity(4, dtype=np.float32).T.ravel(), (2, 1))
+    ibm[0, 13], ibm[1, 13] = -1, -2
+    glb.json["skins"][0]["inverseBindMatrices"] = glb.add_accessor(ibm, "MAT4")
+
+    times = np.linspace(0, 1, 11, dtype=np.float32)
+    translation = np.stack([times * 0.5, 1 + 0.1 * np.sin(times * 6), times], 1).astype(np.float32)
+    time_accessor = glb.add_accessor(times)
+    glb.json["accessors"][time_accessor].update(min=[0.0], max=[1.0])
+    glb.json["animations"].append({
+        "name": "walk",
+        "samplers": [{"input": time_accessor, "output": glb.add_accessor(translation)}],
+        "channels": [{"sampler": 0, "target": {"node": 1, "path": "translation"}}],
+    })
+
+    glb.add_accessor(np.zeros(7, dtype=np.float32))  # referenced by nothing
+    return glb
+
+
+def decode_png(data):
+    """Decode the 8-bit, unfiltered PNGs encode_png writes; checks every CRC."""
+    assert data[:8] == PNG_SIGNATURE
+    chunks, offset = {}, 8
+    while offset < len(data):
+        (length,) = struct.unpack(">I", data[offset:offset + 4])
+        kind, body = data[offset + 4:offset + 8], data[offset + 8:offset + 8 + length]
+        (crc,) = struct.unpack(">I", data[offset + 8 + length:offset + 12 + length])
+        assert crc == zlib.crc32(kind + body) & 0xFFFFFFFF
+        chunks.setdefault(kind, []).append(body)
+        offset += 12 + length
+    assert list(chunks)[-1] == b"IEND"
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][0][:10])
+    assert depth == 8
+    channels = {0: 1, 4: 2, 2: 3, 6: 4}[color_type]
+    raw = np.frombuffer(zlib.decompress(b"".join(chunks[b"IDAT"])), dtype=np.uint8)
+    rows = raw.reshape(height, width * channels + 1)
+    assert not rows[:, 0].any()  # filter type 0 on every row
+    return rows[:, 1:].reshape(height, width, channels)
+
+
+@pytest.fixture
+def glb():
+    """A freshly serialized and reloaded test GLB."""
+    return Glb.loads(build_glb().dumps())
+
+
+@pytest.fixture
+def glb_path(tmp_path):
+    path = tmp_path / "model.glb"
+    build_glb().save(path)
+    return path
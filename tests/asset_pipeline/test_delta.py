@@ -0,0 +1,328 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from asset_pipeline import delta
+from asset_pipeline.__main__ import main
+from asset_pipeline.delta import MAGIC, PatchError, apply_delta, make_delta, update_patches
+from asset_pipeline.manifest import build_manifest
+
+BLOCK = 64
+HEADER_SIZE = len(MAGIC) + 4 + 8 + 32 + 8 + 32
+
+
+def _random(size, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+def _ops_size(patch):
+    """Bytes after the header, i.e. what the ops cost."""
+    return len(patch) - HEADER_SIZE
+
+
+BASE = _random(4096)
+CASES = {
+    "empty basis": (b"", BASE),
+    "empty target": (BASE, b""),
+    "both empty": (b"", b""),
+    "identical": (BASE, BASE),
+    "shorter than a block": (BASE[:10], BASE[:20]),
+    "zero blocks": (b"\0" * 4096, b"\0" * 4096),
+    "zero blocks grown": (b"\0" * 4096, b"\0" * 5000),
+    "insert mid block": (BASE, BASE[:1000] + b"inserted" + BASE[1000:]),
+    "delete mid block": (BASE, BASE[:1000] + BASE[1100:]),
+    "overwrite": (BASE, BASE[:2000] + b"x" * 10 + BASE[2010:]),
+    "moved blocks": (BASE, BASE[2048:] + BASE[:2048]),
+    "unrelated": (BASE, _random(4096, seed=1)),
+}
+
+
+@pytest.mark.parametrize("old, new", CASES.values(), ids=CASES.keys())
+def test_round_trip(old, new):
+    patch = make_delta(old, new, BLOCK)
+    assert apply_delta(old, patch) == new
+
+
+@pytest.mark.parametrize("old, new", CASES.values(), ids=CASES.keys())
+def test_round_trip_across_windows(monkeypatch, old, new):
+    patch = make_delta(old, new, BLOCK)
+    monkeypatch.setattr(delta, "WINDOW", 100)  # matches start and end in other windows
+    assert make_delta(old, new, BLOCK) == patch
+
+
+def test_weak_checksums_match_the_definition():
+    data = _random(1000) + b"\xff" * 500
+    for step in (1, 7, BLOCK):
+        expected = []
+        for k in range(0, len(data) - BLOCK + 1, step):
+            block = data[k:k + BLOCK]
+            a = sum(block) & 0xFFFF
+            b = sum((BLOCK - j) * byte for j, byte in enumerate(block)) & 0xFFFF
+            expected.append(a | b << 16)
+        assert delta._weak_checksums(data, BLOCK, step).tolist() == expected
+
+
+def test_streams(tmp_path):
+    new = BASE[:1000] + b"inserted" + BASE[1000:]
+    patch = make_delta(BASE, new, BLOCK)
+    out = io.BytesIO()
+    assert apply_delta(io.BytesIO(BASE), io.BytesIO(patch), out) == len(new)
+    assert out.getvalue() == new
+
+
+def test_identical_file_is_all_copy():
+    patch = make_delta(BASE, BASE, BLOCK)
+    assert _ops_size(patch) == 13 + 1  # one COPY and END
+
+
+def test_repeated_blocks_stay_one_copy():
+    zeros = b"\0" * 4096
+    assert _ops_size(make_delta(zeros, zeros, BLOCK)) == 13 + 1
+
+
+def test_large_zero_file_is_all_copy():
+    zeros = bytes(4 << 20)
+    assert _ops_size(make_delta(zeros, zeros + b"\0" * 100)) == 13 + 5 + 100 + 1
+
+
+def test_insert_costs_about_a_block():
+    new = BASE[:1000] + b"inserted" + BASE[1000:]
+    assert _ops_size(make_delta(BASE, new, BLOCK)) < 2 * BLOCK + 3 * 13
+
+
+def test_truncated_patch_at_every_length():
+    new = BASE[:1000] + b"inserted" + BASE[1000:]
+    patch = make_delta(BASE, new, BLOCK)
+    for length in range(len(patch)):
+        with pytest.raises(PatchError):
+            apply_delta(BASE, patch[:length])
+
+
+def test_corrupt_patches():
+    new = BASE[:1000] + b"inserted" + BASE[1000:]
+    patch = bytearray(make_delta(BASE, new, BLOCK))
+
+    with pytest.raises(PatchError, match="bad magic"):
+        apply_delta(BASE, b"NOTPATCH" + patch[8:])
+    with pytest.raises(PatchError, match="got 4000 bytes"):
+        apply_delta(BASE[:4000], patch)
+    with pytest.raises(PatchError, match="Unknown patch op"):
+        apply_delta(BASE, patch[:-1] + b"\x07")
+
+    literal = bytes(patch).index(b"inserted")
+    flipped = patch.copy()
+    flipped[literal] ^= 0xFF
+    with pytest.raises(PatchError, match="SHA-256"):
+        apply_delta(BASE, flipped)
+
+
+def test_copy_outside_the_basis():
+    header = make_delta(BASE, BASE[:100], BLOCK)[:HEADER_SIZE]
+    past_end = header + bytes([1]) + (4090).to_bytes(8, "little") + (100).to_bytes(4, "little") + b"\0"
+    with pytest.raises(PatchError, match="runs past"):
+        apply_delta(BASE, past_end)
+    too_long = header + bytes([1]) + (0).to_bytes(8, "little") + (200).to_bytes(4, "little") + b"\0"
+    with pytest.raises(PatchError, match="overruns"):
+        apply_delta(BASE, too_long)
+
+
+def test_apply_patch_cli(tmp_path):
+    new = BASE[:1000] + b"inserted" + BASE[1000:]
+    (tmp_path / "old").write_bytes(BASE)
+    (tmp_path / "good.patch").write_bytes(make_delta(BASE, new, BLOCK))
+    (tmp_path / "bad.patch").write_bytes(make_delta(BASE, new, BLOCK)[:-20])
+
+    assert main(["apply-patch", str(tmp_path / "old"), str(tmp_path / "good.patch"), str(tmp_path / "new")]) == 0
+    assert (tmp_path / "new").read_bytes() == new
+    assert main(["apply-patch", str(tmp_path / "old"), str(tmp_path / "bad.patch"), str(tmp_path / "bad")]) == 1
+    assert not (tmp_path / "bad").exists()
+    assert not (tmp_path / "bad.tmp").exists()
+
+
+# ── update_patches ───────────────────────────────────────────
+
+
+class Pipeline:
+    """A public/ tree plus history and patch dirs, run like write_manifest does."""
+
+    def __init__(self, root):
+        self.public = root / "public"
+        self.history = root / "asset-history"
+        self.patches = root / "asset-patches"
+
+    def write(self, name, data):
+        path = self.public / "assets" / "sprites" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def run(self):
+        manifest = build_manifest(str(self.public))
+        return update_patches(str(self.public), manifest, str(self.history), str(self.patches), block_size=BLOCK)
+
+    def releases(self):
+        return json.loads((self.history / "releases.json").read_text())["releases"]
+
+    def latest(self):
+        return json.loads((self.patches / "latest.json").read_text())
+
+    def objects(self):
+        return sorted(f for _, _, files in os.walk(self.history / "objects") for f in files)
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entry(patch_manifest, name):
+    return next(a for a in patch_manifest["assets"] if a["path"] == f"assets/sprites/{name}")
+
+
+def _cow_history(releases):
+    return [release["assets"]["assets/sprites/cow.png"] for release in releases]
+
+
+def test_update_patches_versions(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    cow = [BASE, BASE[:1000] + b"v2" + BASE[1000:], BASE[:3000] + b"v3" + BASE[3000:]]
+    pig = [_random(4096, seed=2), _random(4096, seed=2)[:-1] + b"!"]
+    pipeline.write("cow.png", cow[0])
+    pipeline.write("pig.png", pig[0])
+
+    assert pipeline.run() is None  # baseline
+    assert pipeline.latest() == {"version": 1, "blockSize": BLOCK, "assets": []}
+    assert [r["version"] for r in pipeline.releases()] == [1]
+    assert pipeline.run() is None  # nothing changed
+    assert pipeline.latest()["version"] == 1
+
+    pipeline.write("cow.png", cow[1])
+    v2 = pipeline.run()
+    assert v2["version"] == pipeline.releases()[-1]["version"] == 2
+    assert [a["path"] for a in v2["assets"]] == ["assets/sprites/cow.png"]
+    assert (pipeline.patches / "v2" / "patch-manifest.json").exists()
+    assert pipeline.latest() == v2
+
+    pipeline.write("cow.png", cow[2])
+    pipeline.write("pig.png", pig[1])
+    v3 = pipeline.run()
+    assert v3["version"] == 3
+    entry = _entry(v3, "cow.png")
+    assert entry["sha256"] == _sha(cow[2]) and entry["version"] == 3
+    assert [p["from"] for p in entry["patches"]] == [_sha(cow[1]), _sha(cow[0])]
+    # Every patch rebuilds the current file, so v1 and v2 clients can both update
+    for patch, old in zip(entry["patches"], (cow[1], cow[0])):
+        assert apply_delta(old, (pipeline.patches / patch["uri"]).read_bytes()) == cow[2]
+        assert patch["bytes"] < len(cow[2]) * 0.8
+
+    pipeline.write("pig.png", pig[0][:-1] + b"?")
+    v4 = pipeline.run()
+    # cow didn't change in v4 but its v3 entry is carried into latest.json
+    assert _entry(v4, "cow.png") == entry
+    assert _entry(v4, "pig.png")["version"] == 4
+    assert pipeline.latest() == v4
+
+
+def test_history_keeps_the_last_releases(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    versions = [BASE[:n * 100] + b"edit" + BASE[n * 100:] for n in range(6)]
+    for data in versions:
+        pipeline.write("cow.png", data)
+        pipeline.run()
+    releases = pipeline.releases()
+    assert [r["version"] for r in releases] == [4, 5, 6]
+    assert _cow_history(releases) == [_sha(v) for v in versions[-3:]]
+    assert pipeline.objects() == sorted(_sha(v) for v in versions[-3:])
+    # Patches come from the cow of every release retained before v6
+    assert len(_entry(pipeline.latest(), "cow.png")["patches"]) == 3
+
+
+def test_unchanged_assets_stay_patchable_from_old_releases(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    pipeline.write("cow.png", BASE)
+    pipeline.write("pig.png", _random(4096, seed=2))
+    pipeline.run()
+    for n in range(3):
+        pipeline.write("pig.png", _random(4096, seed=3 + n))
+        pipeline.run()
+
+    # cow last changed in v1, but a v1 client still gets its patch to the new cow
+    pipeline.write("cow.png", BASE[:1000] + b"new" + BASE[1000:])
+    entry = _entry(pipeline.run(), "cow.png")
+    assert [p["from"] for p in entry["patches"]] == [_sha(BASE)]
+
+
+def test_revert_to_a_retained_version(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    v1, v2 = BASE, BASE[:1000] + b"v2" + BASE[1000:]
+    pipeline.write("cow.png", v1)
+    pipeline.run()
+    pipeline.write("cow.png", v2)
+    pipeline.run()
+
+    pipeline.write("cow.png", v1)
+    v3 = pipeline.run()
+    assert v3["version"] == 3
+    entry = _entry(v3, "cow.png")
+    assert entry["sha256"] == _sha(v1)
+    assert [p["from"] for p in entry["patches"]] == [_sha(v2)]  # no v1 -> v1 self-patch
+    assert os.listdir(pipeline.patches / "v3" / "assets" / "sprites") == [f"cow.png.{_sha(v2)[:16]}.patch"]
+    assert _cow_history(pipeline.releases()) == [_sha(v1), _sha(v2), _sha(v1)]
+
+    # v3 is the newest release, so running again is a no-op
+    assert pipeline.run() is None
+    assert pipeline.latest()["version"] == 3
+
+
+def test_lost_history_never_reuses_a_published_release(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    cow = [BASE, BASE[:1000] + b"v2" + BASE[1000:], BASE[:2000] + b"v3" + BASE[2000:],
+           BASE[:3000] + b"v4" + BASE[3000:]]
+    pipeline.write("cow.png", cow[0])
+    pipeline.write("pig.png", _random(4096, seed=2))
+    pipeline.run()
+    pipeline.write("cow.png", cow[1])
+    pipeline.run()
+    published = {path: path.read_bytes() for path in pipeline.patches.rglob("*") if path.is_file()}
+
+    # A fresh clone without asset-history, or a second machine that lost it
+    shutil.rmtree(pipeline.history)
+    pipeline.write("cow.png", cow[2])
+    v3 = pipeline.run()
+    assert v3["version"] == 3
+    assert [(a["path"], a["patches"]) for a in v3["assets"]] == [
+        ("assets/sprites/cow.png", []), ("assets/sprites/pig.png", [])]
+    for path, data in published.items():
+        if path.name != "latest.json":
+            assert path.read_bytes() == data
+
+    # History is rebuilt from v3, so patches resume
+    pipeline.write("cow.png", cow[3])
+    v4 = pipeline.run()
+    assert v4["version"] == 4
+    assert [p["from"] for p in _entry(v4, "cow.png")["patches"]] == [_sha(cow[2])]
+
+
+def test_version_comes_from_the_newest_published_release(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    pipeline.write("cow.png", BASE)
+    pipeline.run()
+    (pipeline.patches / "v7").mkdir()  # published, but latest.json was rolled back
+    pipeline.write("cow.png", BASE[:1000] + b"new" + BASE[1000:])
+    assert pipeline.run()["version"] == 8
+
+
+def test_mismatched_base_is_skipped(tmp_path, capsys):
+    pipeline = Pipeline(tmp_path)
+    pipeline.write("cow.png", BASE)
+    pipeline.run()
+    (obj,) = [p for p in (pipeline.history / "objects").rglob("*") if p.is_file()]
+    obj.write_text("version https://git-lfs.github.com/spec/v1\n")
+
+    pipeline.write("cow.png", BASE[:1000] + b"new" + BASE[1000:])
+    entry = _entry(pipeline.run(), "cow.png")
+    assert entry["patches"] == []
+    assert "not the released file" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from conftest import PNG_SIGNATURE, decode_png
+
+from asset_pipeline.envmap import (
+    ENV_MAGIC,
+    GAMMA,
+    build_env,
+    equirect_to_cube,
+    face_directions,
+    prefilter_specular,
+    rgbd_encode,
+    spherical_harmonics,
+    spherical_polynomial,
+    texel_solid_angles,
+)
+
+
+def rgbd_decode(rgba):
+    rgba = rgba.astype(np.float64) / 255
+    return rgba[..., :3] ** GAMMA / rgba[..., 3:]
+
+
+def test_cube_geometry():
+    dirs = face_directions(8)
+    np.testing.assert_allclose(np.linalg.norm(dirs, axis=-1), 1)
+    normals = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+    for face, normal in enumerate(normals):
+        assert (dirs[face] @ normal > 1 / math.sqrt(3) - 1e-9).all()
+    assert 6 * texel_solid_angles(8).sum() == pytest.approx(4 * math.pi)
+
+
+def test_constant_radiance():
+    radiance = 1.7
+    faces = equirect_to_cube(np.full((32, 64, 3), radiance, dtype=np.float32), 16)
+    np.testing.assert_allclose(faces, radiance, rtol=1e-6)
+
+    harmonics = spherical_harmonics(faces)
+    np.testing.assert_allclose(harmonics[0], radiance * math.sqrt(4 * math.pi), rtol=1e-6)
+    np.testing.assert_allclose(harmonics[1:], 0, atol=1e-6)
+
+    poly = spherical_polynomial(harmonics)
+    for key in ("xx", "yy", "zz"):
+        np.testing.assert_allclose(poly[key], radiance, rtol=1e-4)
+    for key in ("x", "y", "z", "yz", "zx", "xy"):
+        np.testing.assert_allclose(poly[key], 0, atol=1e-6)
+
+
+def test_directional_radiance_has_the_matching_first_band():
+    faces = np.zeros((6, 16, 16, 3), dtype=np.float32)
+    faces[2] = 1.0  # light from +Y only
+    poly = spherical_polynomial(spherical_harmonics(faces))
+    assert poly["y"][0] > 0
+    np.testing.assert_allclose([poly["x"], poly["z"]], 0, atol=1e-6)
+
+
+def test_mip_chain():
+    faces = equirect_to_cube(np.random.default_rng(0).random((32, 64, 3), dtype=np.float32), 16)
+    mips = prefilter_specular(faces)
+    assert [mip.shape for mip in mips] == [(6, s, s, 3) for s in (16, 8, 4, 2, 1)]
+    np.testing.assert_array_equal(mips[0], faces)
+    # Rougher levels blur towards the mean
+    assert mips[-1].std() < mips[1].std() < faces.std()
+
+
+def test_rgbd_round_trip():
+    rgb = np.array([[0.0, 0.0, 0.0], [0.2, 0.5, 1.0], [4.0, 2.0, 1.0], [100.0, 30.0, 5.0]])
+    encoded = rgbd_encode(rgb)
+    assert encoded.dtype == np.uint8
+    assert encoded[1, 3] == 255  # values up to 1 keep the full divisor
+    np.testing.assert_allclose(rgbd_decode(encoded[1:]), rgb[1:], rtol=0.05)
+    np.testing.assert_allclose(rgbd_decode(encoded[:1]), 0)
+
+
+def test_env_file_layout():
+    radiance = 0.8
+    data, info = build_env(np.full((32, 64, 3), radiance, dtype=np.float32), size=16)
+    assert data.startswith(ENV_MAGIC)
+    end = data.index(b"\0", len(ENV_MAGIC))
+    assert json.loads(data[len(ENV_MAGIC):end]) == info
+    assert info["width"] == 16
+
+    mipmaps = info["specular"]["mipmaps"]
+    assert len(mipmaps) == 6 * 5
+    images = data[end + 1:]
+    position = 0
+    for mip in mipmaps:
+        assert mip["position"] == position
+        image = images[position:position + mip["length"]]
+        assert image.startswith(PNG_SIGNATURE) and image.endswith(b"IEND\xaeB`\x82")
+        np.testing.assert_allclose(rgbd_decode(decode_png(image)), radiance, rtol=0.02)
+        position += mip["length"]
+    assert position == len(images)
+    np.testing.assert_allclose(info["irradiance"]["yy"], radiance, rtol=1e-3)
+
+
+def test_env_size_must_be_a_power_of_two():
+    with pytest.raises(ValueError, match="power of two"):
+        build_env(np.zeros((8, 16, 3), dtype=np.float32), size=24)
@@ -0,0 +1,116 @@
+import struct
+
+import numpy as np
+import pytest
+from conftest import build_glb
+
+from asset_pipeline.glb import TARGET_ARRAY_BUFFER, Glb, GlbError
+
+
+def test_round_trip_preserves_json_and_accessors(glb):
+    again = Glb.loads(glb.dumps())
+    assert again.json == glb.json
+    for index in range(len(glb.json["accessors"])):
+        np.testing.assert_array_equal(again.read_accessor(index), glb.read_accessor(index))
+
+
+def test_read_accessor_is_a_read_only_view(glb):
+    positions = glb.read_accessor(glb.json["meshes"][0]["primitives"][0]["attributes"]["POSITION"])
+    assert positions.shape == (36, 3)
+    assert positions.base is not None
+    with pytest.raises(ValueError):
+        positions[0, 0] = 1
+
+
+def test_interleaved_view():
+    glb = Glb({"asset": {"version": "2.0"}})
+    data = np.arange(12, dtype=np.float32).reshape(4, 3)
+    interleaved = np.zeros((4, 4), dtype=np.float32)
+    interleaved[:, :3] = data
+    view = glb.add_view(interleaved.tobytes(), target=TARGET_ARRAY_BUFFER, byte_stride=16)
+    glb.json["accessors"] = [{"bufferView": view, "componentType": 5126, "count": 4, "type": "VEC3"}]
+    np.testing.assert_array_equal(glb.read_accessor(0), data)
+
+
+def test_write_accessor_pads_vertex_attributes_to_four_bytes():
+    glb = Glb({"asset": {"version": "2.0"}})
+    colors = np.arange(12, dtype=np.uint8).reshape(4, 3)
+    index = glb.add_accessor(colors, target=TARGET_ARRAY_BUFFER, normalized=True)
+    assert glb.json["bufferViews"][glb.json["accessors"][index]["bufferView"]]["byteStride"] == 4
+    np.testing.assert_array_equal(Glb.loads(glb.dumps()).read_accessor(index), colors)
+
+
+def test_compact_drops_replaced_views(glb):
+    views_before = len(glb.json["bufferViews"])
+    position = glb.json["meshes"][0]["primitives"][0]["attributes"]["POSITION"]
+    glb.write_accessor(position, glb.read_accessor(position) * 2)
+    assert len(glb.json["bufferViews"]) == views_before + 1
+    again = Glb.loads(glb.dumps())
+    assert len(again.json["bufferViews"]) == views_before
+    assert again.json["accessors"][position]["max"][1] == pytest.approx(6.0)
+
+
+def test_add_accessor_narrows_float64():
+    glb = Glb({"asset": {"version": "2.0"}})
+    index = glb.add_accessor(np.ones((3, 3), dtype=np.float64))
+    assert glb.json["accessors"][index]["componentType"] == 5126
+    assert glb.read_accessor(index).dtype == np.float32
+
+
+def test_add_accessor_rejects_unmapped_dtype():
+    glb = Glb({"asset": {"version": "2.0"}})
+    with pytest.raises(GlbError, match="int64"):
+        glb.add_accessor(np.ones((3, 3), dtype=np.int64))
+    with pytest.raises(GlbError, match="5 components"):
+        glb.add_accessor(np.ones((3, 5), dtype=np.float32))
+
+
+def test_sparse_accessor_is_densified():
+    glb = Glb.loads(build_glb(morph=True, sparse_morph=True).dumps())
+    dense = Glb.loads(build_glb(morph=True).dumps())
+    sparse_index = glb.json["meshes"][0]["primitives"][0]["targets"][0]["POSITION"]
+    dense_index = dense.json["meshes"][0]["primitives"][0]["targets"][0]["POSITION"]
+    assert "sparse" in glb.json["accessors"][sparse_index]
+    np.testing.assert_array_equal(glb.read_accessor(sparse_index), dense.read_accessor(dense_index))
+
+
+def test_sparse_accessor_over_a_base_view():
+    glb = Glb({"asset": {"version": "2.0"}})
+    base = glb.add_accessor(np.arange(5, dtype=np.float32))
+    glb.json["accessors"][base]["sparse"] = {
+        "count": 2,
+        "indices": {"bufferView": glb.add_view(np.uint8([1, 3]).tobytes()), "componentType": 5121},
+        "values": {"bufferView": glb.add_view(np.float32([10, 30]).tobytes())},
+    }
+    glb = Glb.loads(glb.dumps())
+    np.testing.assert_array_equal(glb.read_accessor(base).ravel(), [0, 10, 2, 30, 4])
+
+    glb.write_accessor(base, glb.read_accessor(base) + 1)
+    assert "sparse" not in glb.json["accessors"][base]
+    np.testing.assert_array_equal(Glb.loads(glb.dumps()).read_accessor(base).ravel(), [1, 11, 3, 31, 5])
+
+
+def test_sparse_index_out_of_range():
+    glb = Glb({"asset": {"version": "2.0"}})
+    glb.json["accessors"] = [{
+        "componentType": 5126, "count": 2, "type": "SCALAR",
+        "sparse": {
+            "count": 1,
+            "indices": {"bufferView": glb.add_view(np.uint8([5]).tobytes()), "componentType": 5121},
+            "values": {"bufferView": glb.add_view(np.float32([1]).tobytes())},
+        },
+    }]
+    with pytest.raises(GlbError, match="indexes past"):
+        glb.read_accessor(0)
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"version https://git-lfs.github.com/spec/v1\noid sha256:00\nsize 1\n", "bad magic"),
+    (b"glTF", "too short"),
+    (struct.pack("<III", 0x46546C67, 1, 12), "version 1"),
+    (struct.pack("<III", 0x46546C67, 2, 40) + struct.pack("<II", 16, 0x4E4F534A) + b"{", "truncated"),
+    (struct.pack("<III", 0x46546C67, 2, 24) + struct.pack("<II", 4, 0x4E4F534A) + b"{{{{", "not valid JSON"),
+])
+def test_bad_files_raise_glb_error(data, message):
+    with pytest.raises(GlbError, match=message):
+        Glb.loads(data)
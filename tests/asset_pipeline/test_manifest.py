@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from conftest import build_glb
+
+from asset_pipeline.manifest import write_manifest
+
+ANIMALS = ("chicken", "cow", "duck", "pig", "sheep")
+
+
+@pytest.fixture
+def public_dir(tmp_path):
+    """A public/ tree shaped like the real pipeline output."""
+    public = tmp_path / "public"
+    glb = build_glb().dumps()
+
+    def write(rel_path, data):
+        path = public / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    for animal in ANIMALS:
+        # convert_fbx_to_glb.py writes straight into models/, with --vat sidecars
+        write(f"assets/models/{animal}.glb", glb)
+        write(f"assets/models/{animal}.vat.json", b"{}")
+        write(f"assets/models/{animal}.vat.bin", b"\0" * 64)
+        write(f"assets/models/animals/{animal}.glb", glb)
+        write(f"assets/sprites/{animal}_portrait.png", b"png " + animal.encode())
+    for farmer in ("john", "mary"):
+        write(f"assets/models/farmers/{farmer}.glb", glb)
+        write(f"assets/models/farmers/{farmer}.walk.glb", glb)
+        write(f"assets/sprites/farmer_{farmer}_portrait.png", b"png " + farmer.encode())
+    write("assets/sprites/strips/cow_idle.png", b"strip")
+    write("assets/sprites/strips/cow_idle.json", b"{}")
+    write("assets/backgrounds/menu_farm.png", b"background")
+    write("assets/environment/environment.env", b"env")
+    write("assets/audio/moo.mp3", b"not a pipeline asset")
+    return public
+
+
+def test_tiers_for_pipeline_output(public_dir):
+    manifest = write_manifest(str(public_dir), patches=False)
+    tiers = {asset["path"]: asset["tier"] for asset in manifest["assets"]}
+
+    for animal in ANIMALS:
+        assert tiers[f"assets/models/{animal}.glb"] == "menu"
+        assert tiers[f"assets/models/animals/{animal}.glb"] == "menu"
+        assert tiers[f"assets/sprites/{animal}_portrait.png"] == "gameplay"
+        assert tiers[f"assets/models/{animal}.vat.json"] == "lazy"
+        assert tiers[f"assets/models/{animal}.vat.bin"] == "lazy"
+    for farmer in ("john", "mary"):
+        assert tiers[f"assets/models/farmers/{farmer}.glb"] == "menu"
+        assert tiers[f"assets/models/farmers/{farmer}.walk.glb"] == "lazy"
+        assert tiers[f"assets/sprites/farmer_{farmer}_portrait.png"] == "menu"
+    assert tiers["assets/backgrounds/menu_farm.png"] == "splash"
+    assert tiers["assets/environment/environment.env"] == "gameplay"
+    assert tiers["assets/sprites/strips/cow_idle.png"] == "lazy"
+    assert "assets/audio/moo.mp3" not in tiers
+
+
+def test_manifest_file(public_dir):
+    manifest = write_manifest(str(public_dir), patches=False)
+    with open(public_dir / "assets" / "manifest.json") as f:
+        assert json.load(f) == manifest
+
+    order = [asset["tier"] for asset in manifest["assets"]]
+    assert order == sorted(order, key=("splash", "menu", "gameplay", "lazy").index)
+    for tier, info in manifest["tiers"].items():
+        members = [a for a in manifest["assets"] if a["tier"] == tier]
+        assert info == {"count": len(members), "bytes": sum(a["bytes"] for a in members)}
+
+    entries = {asset["path"]: asset for asset in manifest["assets"]}
+    assert entries["assets/models/cow.vat.json"]["dependencies"] == ["assets/models/cow.vat.bin"]
+    assert entries["assets/sprites/strips/cow_idle.json"]["dependencies"] == ["assets/sprites/strips/cow_idle.png"]
+    cow = entries["assets/models/cow.glb"]
+    assert cow["hash"] == cow["sha256"][:16]
+    assert cow["bytes"] == (public_dir / "assets/models/cow.glb").stat().st_size
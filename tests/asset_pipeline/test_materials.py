@@ -0,0 +1,81 @@
+import copy
+
+from conftest import build_glb
+
+from asset_pipeline.__main__ import main
+from asset_pipeline.materials import material_signatures, report_signatures, shader_signature
+
+
+def _gltf_with_second_primitive(**material):
+    gltf = copy.deepcopy(build_glb().json)
+    primitives = gltf["meshes"][0]["primitives"]
+    primitives.append(copy.deepcopy(primitives[0]))
+    primitives[1]["material"] = 1
+    gltf["materials"][1].update(material)
+    return gltf
+
+
+def _signatures(gltf):
+    return [shader_signature(gltf, p) for p in gltf["meshes"][0]["primitives"]]
+
+
+def test_names_and_extras_share_a_signature():
+    gltf = _gltf_with_second_primitive(extras={"source": "blender"})
+    first, second = _signatures(gltf)
+    assert first == second
+
+
+def test_parameters_and_layout_change_the_signature():
+    first, second = _signatures(_gltf_with_second_primitive(doubleSided=True))
+    assert first != second
+
+    gltf = _gltf_with_second_primitive()
+    del gltf["meshes"][0]["primitives"][1]["attributes"]["COLOR_0"]
+    first, second = _signatures(gltf)
+    assert first != second
+
+
+def test_texture_slots_ignore_the_texture_index():
+    a = _gltf_with_second_primitive()
+    a["materials"][0]["pbrMetallicRoughness"]["baseColorTexture"] = {"index": 0}
+    a["materials"][1]["pbrMetallicRoughness"]["baseColorTexture"] = {"index": 3}
+    first, second = _signatures(a)
+    assert first == second
+
+    a["materials"][1]["pbrMetallicRoughness"]["baseColorTexture"]["texCoord"] = 1
+    first, second = _signatures(a)
+    assert first != second
+
+
+def test_material_signatures_names():
+    glb = build_glb()
+    primitives = glb.json["meshes"][0]["primitives"]
+    primitives.append(dict(primitives[0], material=1))
+    assert list(material_signatures(glb).values()) == [["MatA", "MatB"]]
+
+
+def test_report_signatures_across_files(tmp_path, capsys):
+    paths = [tmp_path / "cow.glb", tmp_path / "pig.glb", tmp_path / "morph.glb"]
+    build_glb().save(paths[0])
+    build_glb().save(paths[1])
+    build_glb(morph=True).save(paths[2])
+
+    combined, failed = report_signatures(paths)
+    assert failed == []
+    assert sorted(entry["files"] for entry in combined.values()) == [
+        [str(paths[0]), str(paths[1])], [str(paths[2])]]
+    assert "2 unique across 3 GLBs" in capsys.readouterr().out
+
+
+def test_report_signatures_skips_unreadable_files(glb_path, tmp_path, capsys):
+    pointer = tmp_path / "pointer.glb"
+    pointer.write_text("version https://git-lfs.github.com/spec/v1\n")
+
+    combined, failed = report_signatures([pointer, glb_path])
+    assert failed == [pointer]
+    assert [entry["files"] for entry in combined.values()] == [[str(glb_path)]]
+    out = capsys.readouterr().out
+    assert "bad magic" in out and "1 unreadable GLBs skipped" in out
+
+    assert main(["materials", str(pointer), str(glb_path)]) == 1
+    assert main(["materials", str(glb_path)]) == 0
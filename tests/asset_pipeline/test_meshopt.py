@@ -0,0 +1,113 @@
+import copy
+from collections import Counter
+
+import numpy as np
+from conftest import build_glb, grid
+
+from asset_pipeline.glb import Glb
+from asset_pipeline.meshopt import acmr, fetch_remap, optimize_file, optimize_meshes, optimize_primitive, weld
+
+
+def _shuffled_unwelded(seed=0):
+    """A grid with shuffled triangles where every corner has its own vertex."""
+    glb = build_glb(n=12)
+    primitive = glb.json["meshes"][0]["primitives"][0]
+    indices = glb.read_accessor(primitive["indices"]).ravel().copy()
+    np.random.default_rng(seed).shuffle(indices.reshape(-1, 3))
+    for name, accessor in primitive["attributes"].items():
+        glb.write_accessor(accessor, glb.read_accessor(accessor)[indices])
+    glb.write_accessor(primitive["indices"], np.arange(len(indices), dtype=np.uint16))
+    return Glb.loads(glb.dumps())
+
+
+def _triangles(glb, primitive):
+    """Multiset of triangles as vertex data, rotated to start at the smallest corner (keeps winding)."""
+    rows = np.hstack([glb.read_accessor(primitive["attributes"][name]).astype(np.float64)
+                      for name in sorted(primitive["attributes"])])
+    indices = glb.read_accessor(primitive["indices"]).ravel()
+    result = Counter()
+    for tri in indices.reshape(-1, 3).tolist():
+        corners = [tuple(rows[v]) for v in tri]
+        start = corners.index(min(corners))
+        result[tuple(corners[start:] + corners[:start])] += 1
+    return result
+
+
+def test_triangles_and_winding_preserved():
+    glb = _shuffled_unwelded()
+    primitive = glb.json["meshes"][0]["primitives"][0]
+    before = _triangles(glb, primitive)
+    stats = optimize_primitive(glb, primitive)
+    assert stats["triangles"] == sum(before.values())
+    assert _triangles(glb, primitive) == before
+
+
+def test_acmr_not_worse():
+    for seed in range(3):
+        glb = _shuffled_unwelded(seed)
+        primitive = glb.json["meshes"][0]["primitives"][0]
+        stats = optimize_primitive(glb, primitive)
+        assert stats["acmr_after"] <= stats["acmr_before"]
+        indices = glb.read_accessor(primitive["indices"]).ravel()
+        assert acmr(indices) == stats["acmr_after"]
+
+
+def test_weld_and_fetch_order():
+    glb = _shuffled_unwelded()
+    primitive = glb.json["meshes"][0]["primitives"][0]
+    stats = optimize_primitive(glb, primitive)
+    assert stats["vertices_before"] == 121 * 6
+    assert stats["vertices_after"] == 144
+    # Vertices are numbered in first-use order
+    indices = glb.read_accessor(primitive["indices"]).ravel()
+    _, first = np.unique(indices, return_index=True)
+    np.testing.assert_array_equal(indices[np.sort(first)], np.arange(144))
+
+
+def test_weld_keeps_first_occurrence_order():
+    data = np.array([[3], [1], [3], [2], [1]], dtype=np.float32)
+    remap, first = weld([data])
+    np.testing.assert_array_equal(remap, [0, 1, 0, 2, 1])
+    np.testing.assert_array_equal(first, [0, 1, 3])
+
+
+def test_fetch_remap_drops_unused_vertices():
+    remap, used = fetch_remap(np.array([4, 2, 4, 0]), 5)
+    assert used == 3
+    np.testing.assert_array_equal(remap, [2, -1, 1, -1, 0])
+
+
+def test_morph_targets_follow_their_vertices():
+    glb = build_glb(morph=True)
+    primitive = glb.json["meshes"][0]["primitives"][0]
+    positions = glb.read_accessor(primitive["attributes"]["POSITION"]).copy()
+    deltas = glb.read_accessor(primitive["targets"][0]["POSITION"]).copy()
+    moved = {tuple(p) for p in positions[deltas[:, 2] != 0]}
+    optimize_primitive(glb, primitive)
+    positions = glb.read_accessor(primitive["attributes"]["POSITION"])
+    deltas = glb.read_accessor(primitive["targets"][0]["POSITION"])
+    assert {tuple(p) for p in positions[deltas[:, 2] != 0]} == moved
+
+
+def test_sparse_primitives_are_skipped(tmp_path, capsys):
+    glb = build_glb(morph=True, sparse_morph=True)
+    primitives = glb.json["meshes"][0]["primitives"]
+    primitives.append(copy.deepcopy(primitives[0]))
+    del primitives[1]["targets"]
+    path = tmp_path / "morph.glb"
+    glb.save(path)
+
+    totals = optimize_file(path)
+    assert totals["primitives"] == 1
+    assert totals["triangles"] == len(grid()[1]) // 3
+    assert "sparse accessors" in capsys.readouterr().out
+
+    glb = Glb.load(path)
+    target = glb.json["meshes"][0]["primitives"][0]["targets"][0]["POSITION"]
+    assert "sparse" in glb.json["accessors"][target]
+
+
+def test_non_triangle_primitives_are_skipped():
+    glb = build_glb()
+    glb.json["meshes"][0]["primitives"][0]["mode"] = 1
+    assert optimize_meshes(glb)["primitives"] == 0
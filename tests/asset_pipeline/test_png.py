@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+from conftest import decode_png
+
+from asset_pipeline.png import encode_png, write_png
+
+
+@pytest.mark.parametrize("channels", [None, 1, 2, 3, 4])
+def test_png_round_trip(channels):
+    shape = (5, 7) if channels is None else (5, 7, channels)
+    pixels = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    decoded = decode_png(encode_png(pixels))
+    np.testing.assert_array_equal(decoded.reshape(pixels.shape), pixels)
+
+
+def test_write_png(tmp_path):
+    pixels = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    path = tmp_path / "out.png"
+    assert write_png(path, pixels) == path.stat().st_size
+    np.testing.assert_array_equal(decode_png(path.read_bytes()), pixels)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from conftest import build_glb
+
+from asset_pipeline.__main__ import main
+from asset_pipeline.glb import Glb
+from asset_pipeline.split import CHUNKS_KEY, split_animations
+
+
+@pytest.fixture
+def farmer_path(tmp_path):
+    """The test GLB with an idle clip on Spine next to its walk clip on Hips."""
+    glb = build_glb()
+    times = np.linspace(0, 2, 5, dtype=np.float32)
+    time_accessor = glb.add_accessor(times)
+    glb.json["accessors"][time_accessor].update(min=[0.0], max=[2.0])
+    rotation = np.tile(np.float32([0, 0, 0, 1]), (len(times), 1))
+    glb.json["animations"].insert(0, {
+        "name": "idle",
+        "samplers": [{"input": time_accessor, "output": glb.add_accessor(rotation)}],
+        "channels": [{"sampler": 0, "target": {"node": 2, "path": "rotation"}}],
+    })
+    path = tmp_path / "john.glb"
+    glb.save(path)
+    return path
+
+
+def test_split_keeps_base_clips(farmer_path):
+    walk = Glb.load(farmer_path)
+    walk_keys = walk.read_accessor(walk.json["animations"][1]["samplers"][0]["output"]).copy()
+
+    index = split_animations(str(farmer_path))
+    assert [(c["name"], c["uri"], c["duration"]) for c in index] == [("walk", "john.walk.glb", 1.0)]
+
+    base = Glb.load(farmer_path)
+    assert [a["name"] for a in base.json["animations"]] == ["idle"]
+    assert base.json["asset"]["extras"][CHUNKS_KEY] == index
+    assert len(base.json["meshes"]) == 1
+
+    chunk_path = farmer_path.parent / "john.walk.glb"
+    data = chunk_path.read_bytes()
+    assert index[0]["byteLength"] == len(data)
+    chunk = Glb.load(chunk_path)
+    assert [a["name"] for a in chunk.json["animations"]] == ["walk"]
+    assert [n["name"] for n in chunk.json["nodes"]] == [n["name"] for n in base.json["nodes"]]
+    assert "meshes" not in chunk.json and "skins" not in chunk.json
+    channel = chunk.json["animations"][0]["channels"][0]
+    assert channel["target"] == {"node": 1, "path": "translation"}
+    np.testing.assert_array_equal(chunk.read_accessor(chunk.json["animations"][0]["samplers"][0]["output"]),
+                                  walk_keys)
+
+
+def test_split_without_other_clips(farmer_path):
+    split_animations(str(farmer_path), base_clips=("idle", "walk"))
+    assert not (farmer_path.parent / "john.walk.glb").exists()
+    assert CHUNKS_KEY not in Glb.load(farmer_path).json["asset"].get("extras", {})
+
+
+def test_split_cli_continues_past_bad_files(farmer_path, tmp_path, capsys):
+    pointer = tmp_path / "mary.glb"
+    pointer.write_text("version https://git-lfs.github.com/spec/v1\n")
+    assert main(["split", str(pointer), str(farmer_path)]) == 1
+    assert (tmp_path / "john.walk.glb").exists()
+    assert "bad magic" in capsys.readouterr().out
@@ -0,0 +1,126 @@
+from functools import partial
+
+import numpy as np
+import pytest
+from conftest import build_glb
+
+from asset_pipeline.__main__ import main
+from asset_pipeline.glb import Glb
+from asset_pipeline.materials import dedupe_materials
+from asset_pipeline.transforms import (
+    patch_materials,
+    prune_accessors,
+    recenter,
+    scene_bounds,
+    set_extras,
+    strip_extras,
+    strip_root_motion,
+    transform_file,
+    used_accessors,
+)
+
+
+def _root_translation(glb):
+    sampler = glb.json["animations"][0]["samplers"][0]
+    return glb.read_accessor(sampler["output"])
+
+
+def test_scene_bounds_in_bind_pose(glb):
+    lo, hi = scene_bounds(glb)
+    np.testing.assert_allclose(lo, [3, 1, 0], atol=1e-6)
+    np.testing.assert_allclose(hi, [4, 3, 0], atol=1e-6)
+
+
+def test_recenter_grounds_the_model(glb):
+    before = _root_translation(glb).copy()
+    recenter(glb)
+    lo, hi = scene_bounds(glb)
+    np.testing.assert_allclose([(lo[0] + hi[0]) / 2, lo[1], (lo[2] + hi[2]) / 2], 0, atol=1e-6)
+    np.testing.assert_allclose(glb.json["nodes"][0]["translation"], [-3.5, -1, 0])
+    # Hips keys are relative to the moved root node, so they stay as they were
+    np.testing.assert_array_equal(_root_translation(glb), before)
+
+
+def test_recenter_shifts_animated_roots(glb):
+    glb.json["animations"][0]["channels"][0]["target"]["node"] = 0
+    before = _root_translation(glb).copy()
+    recenter(glb)
+    np.testing.assert_allclose(_root_translation(glb), before + [-3.5, -1, 0], atol=1e-6)
+
+
+def test_recenter_vertically(glb):
+    recenter(glb, ground=False)
+    lo, hi = scene_bounds(glb)
+    np.testing.assert_allclose((lo + hi) / 2, 0, atol=1e-6)
+
+
+def test_strip_root_motion_keeps_the_vertical_bob(glb):
+    before = _root_translation(glb).copy()
+    strip_root_motion(glb)
+    after = _root_translation(glb)
+    np.testing.assert_array_equal(after[:, [0, 2]], np.broadcast_to(before[0, [0, 2]], (len(before), 2)))
+    np.testing.assert_array_equal(after[:, 1], before[:, 1])
+
+
+def test_prune_drops_only_unreferenced_accessors(glb):
+    count = len(glb.json["accessors"])
+    assert prune_accessors(glb) == 1
+    assert len(glb.json["accessors"]) == count - 1
+    assert used_accessors(glb.json) == set(range(count - 1))
+    assert prune_accessors(glb) == 0
+
+
+def test_extras(glb):
+    set_extras(glb, {"pipeline": 2, "exporter": None})
+    assert glb.json["asset"]["extras"] == {"pipeline": 2}
+    strip_extras(glb, keep=("pipeline",))
+    assert glb.json["asset"]["extras"] == {"pipeline": 2}
+    assert "extras" not in glb.json["nodes"][3]
+    strip_extras(glb)
+    assert "extras" not in glb.json["asset"]
+
+
+def test_patch_materials(glb):
+    patch_materials(glb, {
+        "*": {"pbrMetallicRoughness.roughnessFactor": 0.8},
+        "MatB": {"pbrMetallicRoughness.metallicFactor": None, "doubleSided": True},
+    })
+    mat_a, mat_b = glb.json["materials"]
+    assert mat_a["pbrMetallicRoughness"] == {"metallicFactor": 0, "roughnessFactor": 0.8}
+    assert mat_b["pbrMetallicRoughness"] == {"roughnessFactor": 0.8}
+    assert mat_b["doubleSided"] is True
+
+
+def test_dedupe_materials(glb):
+    primitives = glb.json["meshes"][0]["primitives"]
+    primitives.append(dict(primitives[0], material=1))
+    assert dedupe_materials(glb) == 1
+    assert [p["material"] for p in primitives] == [0, 0]
+    assert len(glb.json["materials"]) == 1
+
+
+def test_transform_file(glb_path, tmp_path):
+    dst = tmp_path / "out.glb"
+    stats = transform_file(glb_path, [partial(recenter, ground=True), prune_accessors], dst)
+    assert stats["bytes_out"] == dst.stat().st_size < stats["bytes_in"]
+    lo, _ = scene_bounds(Glb.load(dst))
+    assert lo[1] == pytest.approx(0, abs=1e-6)
+
+
+def test_transform_file_with_sparse_morph_targets(tmp_path):
+    path = tmp_path / "morph.glb"
+    build_glb(morph=True, sparse_morph=True).save(path)
+    transform_file(path, [recenter, prune_accessors])
+    glb = Glb.load(path)
+    target = glb.json["meshes"][0]["primitives"][0]["targets"][0]["POSITION"]
+    assert glb.read_accessor(target)[:, 2].max() == pytest.approx(0.25)
+
+
+def test_transform_cli_continues_past_bad_files(glb_path, tmp_path, capsys):
+    pointer = tmp_path / "pointer.glb"
+    pointer.write_text("version https://git-lfs.github.com/spec/v1\n")
+    out_dir = tmp_path / "out"
+    assert main(["transform", str(pointer), str(glb_path), "--prune", "--out-dir", str(out_dir)]) == 1
+    assert (out_dir / glb_path.name).exists()
+    assert not (out_dir / pointer.name).exists()
+    assert "bad magic" in capsys.readouterr().out
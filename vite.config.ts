@@ -1,3 +1,4 @@
+import fs from "node:fs";
 import path from "node:path";
 import tailwindcss from "@tailwindcss/vite";
 import react from "@vitejs/plugin-react";
@@ -36,6 +37,30 @@ function babylonShaderGuardPlugin(): Plugin {
   };
 }
 
+/**
+ * Vite plugin that publishes the asset pipeline's binary patches with the web
+ * build. scripts/asset_pipeline writes them to asset-patches/ (outside
+ * public/ so native apps never bundle them); installed Capacitor builds fetch
+ * asset-patches/latest.json from the deployed site to update their GLBs and
+ * sprites without re-downloading whole files.
+ */
+function assetPatchesPlugin(): Plugin {
+  let outDir = "dist";
+  return {
+    name: "asset-patches",
+    apply: "build",
+    configResolved(config) {
+      outDir = path.resolve(config.root, config.build.outDir);
+    },
+    writeBundle() {
+      const source = path.resolve(__dirname, "asset-patches");
+      if (fs.existsSync(source)) {
+        fs.cpSync(source, path.join(outDir, "asset-patches"), { recursive: true });
+      }
+    },
+  };
+}
+
 // Check if building for Capacitor (mobile/desktop)
 const isCapacitorBuild = process.env.CAPACITOR_BUILD === "true";
 
@@ -56,6 +81,8 @@ export default defineConfig(({ command }) => ({
     // Only use singleFile for Capacitor builds (mobile/desktop)
     // Web builds use proper chunking for better caching
     ...(isCapacitorBuild ? [viteSingleFile()] : []),
+    // Patches are served from the web build only, never bundled into apps
+    ...(isCapacitorBuild ? [] : [assetPatchesPlugin()]),
   ],
   build: {
     // Production optimizations